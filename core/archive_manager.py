@@ -4,6 +4,12 @@ from config.settings import settings
 import logging
 import re
 
+# 描述性查询：XXX为YYY 或 XXX是YYY
+_DESCRIPTIVE_QUERY_PATTERN = re.compile(r'(.+?)(?:为|是)(.+)$')
+# 文档名清理："数字. " 格式的前缀、括号及括号内的内容
+_DOC_INDEX_PREFIX_PATTERN = re.compile(r'^\d+\.\s*')
+_DOC_PAREN_PATTERN = re.compile(r'\([^)]*\)')
+
 class ArchiveManager:
     def __init__(self):
         """初始化档案管理器"""
@@ -13,10 +19,14 @@ class ArchiveManager:
     def connect(self):
         """连接到MySQL数据库"""
         try:
-            # 先关闭现有连接（如果有）
-            if self.connection and self.connection.is_connected():
-                self.connection.close()
-                self.logger.info("关闭旧数据库连接")
+            # 先关闭现有连接（如果有）；已断开的连接也要关闭，才能归还连接池
+            if self.connection is not None:
+                try:
+                    self.connection.close()
+                    self.logger.info("关闭旧数据库连接")
+                except Exception:
+                    pass
+                self.connection = None
 
             self.connection = mysql.connector.connect(
                 host=settings.database_config['host'],
@@ -58,17 +68,20 @@ class ArchiveManager:
             return False
 
     def ensure_fresh_connection(self):
-        """确保使用新的数据库连接"""
+        """确保有可用的数据库连接 - 复用连接池中已取出的连接，断开时才重新获取"""
         try:
-            if self.connection:
-                # 关闭旧连接
+            # 连接为 autocommit + READ COMMITTED，每条查询都能读到最新提交的数据，
+            # 不必每次查询都归还连接、重新取出并重复执行会话设置
+            if self.connection and self.connection.is_connected():
+                return True
+
+            # 连接已断开：先关闭以归还连接池槽位，再重新连接
+            if self.connection is not None:
                 try:
                     self.connection.close()
-                except:
+                except Exception:
                     pass
                 self.connection = None
-
-            # 重新连接
             return self.connect()
 
         except Exception as e:
@@ -141,8 +154,7 @@ class ArchiveManager:
 
         # 特别处理"为"和"是"连接的情况，如"接线方式为三相三线"
         # 正则表达式匹配：XXX为YYY 或 XXX是YYY 的形式
-        pattern = r'(.+?)(?:为|是)(.+)$'
-        match = re.match(pattern, text)
+        match = _DESCRIPTIVE_QUERY_PATTERN.match(text)
 
         if match:
             # 获取关键字前的描述部分（如"接线方式"）和实际值（如"三相三线"）
@@ -267,11 +279,10 @@ class ArchiveManager:
                             document_results = []
                             for doc_name in documents:
                                 # 清理文档名
-                                import re
                                 # 移除 "数字. " 格式的前缀
-                                doc_name_clean = re.sub(r'^\d+\.\s*', '', doc_name)
+                                doc_name_clean = _DOC_INDEX_PREFIX_PATTERN.sub('', doc_name)
                                 # 移除括号及括号内的内容（如"(激光熔覆)"）
-                                doc_name_clean = re.sub(r'\([^)]*\)', '', doc_name_clean)
+                                doc_name_clean = _DOC_PAREN_PATTERN.sub('', doc_name_clean)
                                 # 移除文件扩展名
                                 doc_name_without_ext = doc_name_clean.split('.')[0] if '.' in doc_name_clean else doc_name_clean
                                 # 移除前后空格
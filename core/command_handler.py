@@ -4,14 +4,696 @@ from config.wake_words import WAKE_WORDS
 from utils.logger import setup_logger
 from core.archive_manager import ArchiveManager
 from core.ollama_client import OllamaClient
-import jieba
 import threading
 import time
 import random
 import os
 import glob
+from functools import lru_cache
 from typing import Optional
 
+# jieba 用户词典：固定的自定义词汇
+_JIEBA_USER_DICT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'user_dict.txt')
+
+# 随机回复语料 - 模块级元组，避免每次调用重新构建列表
+_CHAT_EXIT_RESPONSES = (
+    "好的，聊天结束啦~ 需要的时候再叫小电哦！",
+    "聊得很开心呢~ 小电先退下啦，有事随时叫我~",
+    "好的，小电去忙别的啦，想聊天了随时喊我~",
+    "聊天时间结束~ 小电继续待命，等你召唤哦~"
+)
+
+_JOKES = (
+    "为什么档案柜不会说谎？因为它总是有'锁'在身呀！📁",
+    "问：什么档案最受欢迎？答：你正在查询的那一份呀~",
+    "有一天，档案柜对文件说：'别担心，我会好好保管你的！'",
+    "为什么电脑要去医院？因为它有'病毒'了！"
+)
+
+_FALLBACKS = (
+    "这个问题很有趣呢~ 小电正在努力学习中！",
+    "哎呀，小电对这个问题还不太熟悉，换个话题怎么样？",
+    "我们聊点别的吧~ 比如档案管理或者设备控制？",
+    "小电还在成长中，这个问题有点难倒我了~",
+    "哈哈，这个话题好有意思，不过小电还在学习中呢~"
+)
+
+_ARCHIVE_ACK = (
+    "好的，正在为您查询档案信息，请稍后...",
+    "收到，马上为您查找档案,请稍后...",
+    "正在查询的档案，请稍等..."
+)
+
+_EXIT_RESPONSES = (
+    "好的，小电先退下啦，需要的时候随时叫我~",
+    "再见啦，有事随时喊小电哦~",
+    "小电去休息啦，想我了就说'小电'~",
+    "好的，下次见~ 记得叫'小电'唤醒我哦~"
+)
+
+# 问候语模板 - {time_greeting} 在选中后再填充
+_GREETING_TEMPLATES = (
+    "哎~ {time_greeting}呀~ 我是小电，很高兴为你服务哦~ 请问需要查询档案信息，还是控制档案柜呢？",
+    "哎~ {time_greeting}~ 小电来啦~ 可以帮你查询档案或控制柜子，尽管问哦~",
+    "哎~ {time_greeting}呀~ 小电随时为你待命，有什么可以帮忙的吗？",
+    "在呢~ {time_greeting}~ 我是你的智能助手小电，请问有什么需要？",
+    "哎~ {time_greeting}~ 小电在这里，需要查询档案还是控制设备呢？",
+    "来啦~ {time_greeting}呀~ 我是小电，档案查询、柜子控制都可以找我哦~",
+    "嗯~ {time_greeting}~ 小电已就位，请下达指令吧~"
+)
+
+# 档案查询的锚点字符 - 任一查询模式/关键词都至少包含其中一个字
+_ARCHIVE_GATE = frozenset('查找搜显档编信资记')
+
+# 档案查询值中需要剔除的干扰字符
+_ARCHIVE_DROP = str.maketrans('', '', '档案呃干为。，、')
+
+# 档案查询值的常见前缀（只去掉一个，长的在前）
+_ARCHIVE_PREFIX_PATTERN = re.compile(r'^(?:查询|查一下|查找|搜索|查|找|编号|档案编号)')
+# 常见后缀按 '的档案', '档案', '的信息', '的资料', '为', '呃', '干' 的顺序依次去掉，
+# 因此在文本末尾它们按相反顺序排列
+_ARCHIVE_SUFFIX_PATTERN = re.compile(r'(?:干)?(?:呃)?(?:为)?(?:的资料)?(?:的信息)?(?:档案)?(?:的档案)?$')
+
+# 连续数字串 / 独立的3位及以上数字串
+_DIGIT_RUN = re.compile(r'\d+')
+_LONG_DIGIT_RUN = re.compile(r'\b\d{3,}\b')
+
+
+def _longest_digit_run(text, pattern=_DIGIT_RUN):
+    """返回文本中最长的数字串（长度相同时取最先出现的），没有则返回None"""
+    return max((m.group() for m in pattern.finditer(text)), key=len, default=None)
+
+def _first_number_run(text, numerals):
+    """逐字扫描，返回第一段连续的中文数字（numerals 中的字）或阿拉伯数字，没有则返回None"""
+    start = None
+    for index, char in enumerate(text):
+        if char in numerals or char.isdecimal():
+            if start is None:
+                start = index
+        elif start is not None:
+            return text[start:index]
+    return None if start is None else text[start:]
+
+# 文本清洗：语气词和干扰词
+_FILLER_WORDS = (
+    '啊', '呢', '吧', '呀', '哦', '嗯', '那个', '这个', '然后', '就是',
+    '啦', '嘛', '哟', '呃', '哎', '喂', '哈', '哼', '哇', '呐'
+)
+
+# 文本清洗：常见的语音识别错误 - 增强设备控制相关修正
+_COMMON_ERRORS = {
+    '相子': '柜子',
+    '箱子': '柜子',
+    '贵子': '柜子',
+    '柜了': '柜子',
+    '柜勒': '柜子',
+    '柜啦': '柜子',
+    '关毕': '关闭',
+    '完毕': '关闭',
+    '关掉': '关闭',
+    '打开': '打开',
+    '开启': '打开',
+    '关闭': '关闭',
+    '停止': '关闭',
+    '类': '列',
+}
+
+# 第一遍：移除表情符号/特殊符号和语气词
+_CLEAN_NOISE_PATTERN = re.compile(r'[^\w\u4e00-\u9fa5\s]|' + '|'.join(_FILLER_WORDS))
+# 第二遍：修正识别错误并移除空白（先修正再去空格，与原逻辑一致）
+_CLEAN_FIX_PATTERN = re.compile('|'.join(_COMMON_ERRORS) + r'|\s+')
+
+
+def _clean_fix_repl(match):
+    return _COMMON_ERRORS.get(match.group(), '')
+
+# 设备控制意图表 - 按优先级排列：(意图名, 正则片段, 处理方法, 日志)
+_DEVICE_INTENTS = (
+    ('dehumidifier', ('加湿器', '除湿', '净化', '加湿'),
+     '_handle_dehumidifier_control_websocket', "💧 识别为加湿器控制命令"),
+    ('air_conditioner', ('空调', '制冷', '制热'),
+     '_handle_air_conditioner_control_websocket', "❄️ 识别为空调控制命令"),
+    ('rodent', ('除鼠器', '驱鼠器', '除鼠', '驱鼠', '老鼠'),
+     '_handle_rodent_repeller_control_websocket', "🐭 识别为除鼠器控制命令"),
+    ('temperature', ('温度', '湿度', '调节', '设置', '度', '调到', '调制', '调至'),
+     '_handle_temperature_control_websocket', "🌡️ 识别为温湿度控制命令"),
+    ('ventilation', ('通风', '换气'),
+     '_handle_ventilation_control_websocket', "💨 识别为通风控制命令"),
+    ('cabinet', ('柜子', '档案柜', '相子', '箱子', '贵子', '柜了'),
+     '_handle_cabinet_control_websocket', "📁 识别为档案柜控制命令"),
+    # 列号 + 开/关动作（如"打开第三列"）
+    ('cabinet_column', ('[第列].*[开关]', '[开关].*[第列]'),
+     '_handle_cabinet_control_websocket', "📁 识别为带列号的柜子控制命令"),
+    ('status', ('状态', '查看', '监控'),
+     '_handle_status_query_websocket', "📊 识别为状态查询命令"),
+)
+
+# 每个意图编译为一个从开头起的零宽前瞻分支，分支按优先级排列，
+# 一次 match 即可得到优先级最高的命中意图（m.lastgroup）
+_DEVICE_INTENT_UNION = re.compile(
+    '|'.join(f'(?=.*?(?P<{name}>{"|".join(patterns)}))' for name, patterns, _, _ in _DEVICE_INTENTS),
+    re.DOTALL
+)
+
+_DEVICE_INTENT_HANDLERS = {name: (handler, log_message) for name, _, handler, log_message in _DEVICE_INTENTS}
+
+# 设备控制动作/设备名关键词 - 各处理方法共享，避免每次调用重新构建列表
+_OPEN_VERBS = frozenset({'打开', '开启', '启动'})
+_CLOSE_VERBS = frozenset({'关闭', '关', '关掉'})
+_STOP_VERBS = frozenset({'关闭', '停止'})
+_CABINET_CLOSE = frozenset({'关闭', '关', '关掉', '关上', '关毕', '完毕'})
+
+_AIR_CONDITIONER_ON = frozenset({'开机', '打开空调', '启动空调'})
+_AIR_CONDITIONER_OFF = frozenset({'关机', '关闭空调', '关空调'})
+
+# 空调命令分派表：(关键词集合, 空调命令号, 回复)，按优先级排列，取第一个命中的规则
+_AIR_CONDITIONER_RULES = (
+    (_AIR_CONDITIONER_ON, 0, "正在为您打开空调"),
+    (_AIR_CONDITIONER_OFF, 1, "正在为您关闭空调"),
+    # 精确的模式+温度（"制冷18度"必然包含"制冷18"）
+    (frozenset({'制冷18'}), 2, "正在设置空调为制冷18度"),
+    (frozenset({'制冷20'}), 3, "正在设置空调为制冷20度"),
+    (frozenset({'制冷22'}), 4, "正在设置空调为制冷22度"),
+    (frozenset({'除湿25'}), 5, "正在设置空调为除湿25度"),
+    (frozenset({'制热20'}), 6, "正在设置空调为制热20度"),
+    (frozenset({'制热22'}), 7, "正在设置空调为制热22度"),
+    (frozenset({'制热24'}), 8, "正在设置空调为制热24度"),
+    # 没有精确匹配时的智能匹配：默认制冷22度、制热22度、除湿25度、开机、关机
+    (frozenset({'制冷'}), 4, "正在设置空调为制冷22度"),
+    (frozenset({'制热'}), 7, "正在设置空调为制热22度"),
+    (frozenset({'除湿'}), 5, "正在设置空调为除湿25度"),
+    (_OPEN_VERBS, 0, "正在为您打开空调"),
+    (_CLOSE_VERBS, 1, "正在为您关闭空调"),
+)
+
+_HUMIDIFIER_ON = frozenset({'开机', '打开加湿器', '启动加湿器'})
+_HUMIDIFIER_OFF = frozenset({'关机', '关闭加湿器', '关加湿器'})
+
+_RODENT_CLOSE = frozenset({
+    '关闭', '关', '关掉', '停止', '关毕', '关闭除鼠器', '关除鼠器', '关闭驱鼠', '关驱鼠',
+    '关闭除鼠设备', '关闭老鼠器', '关除鼠设备', '关老鼠器'
+})
+_RODENT_HIGH = frozenset({'高频', '高频模式', '除鼠器高频', '高品', '高平', '高频率'})
+_RODENT_LOW = frozenset({'低频', '低频模式', '除鼠器低频', '低品', '低平', '低频率'})
+_RODENT_OPEN = frozenset({
+    '打开除鼠器', '开除鼠器', '开启除鼠器', '启动除鼠器',
+    '打开除鼠', '开除鼠', '开启除鼠', '启动除鼠',
+    '打开老鼠器', '开老鼠器', '开启老鼠器', '启动老鼠器',
+    '打开驱鼠器', '开驱鼠器', '启动驱鼠器'
+})
+_RODENT_OPEN_VERBS = frozenset({'打开', '开', '开启', '启动'})
+_RODENT_NAMES = frozenset({'除鼠器', '驱鼠器', '除鼠设备', '驱鼠设备', '老鼠器', '鼠器', '鼠设备'})
+_RODENT_ANIMALS = frozenset({'老鼠', '鼠', '耗子', '大老鼠', '小老鼠'})
+# "鼠"的同音字（单字）
+_RODENT_HOMOPHONES = frozenset('属述束术树数署蜀薯暑书')
+
+_NGRAM_MAX = max(len(word) for word in (
+    _OPEN_VERBS | _CLOSE_VERBS | _STOP_VERBS | _CABINET_CLOSE | _AIR_CONDITIONER_ON | _AIR_CONDITIONER_OFF |
+    _HUMIDIFIER_ON | _HUMIDIFIER_OFF | _RODENT_CLOSE | _RODENT_HIGH | _RODENT_LOW | _RODENT_OPEN |
+    _RODENT_OPEN_VERBS | _RODENT_NAMES | _RODENT_ANIMALS
+))
+
+
+# 除鼠器关键词的字符类位图：每个关键词集合占一位，关键词首字映射到所属集合的位。
+# 文本对应位为0说明该集合不可能命中，可直接跳过子串集合求交集
+_BIT_RODENT_CLOSE = 1 << 0
+_BIT_RODENT_HIGH = 1 << 1
+_BIT_RODENT_LOW = 1 << 2
+_BIT_RODENT_OPEN = 1 << 3
+_BIT_RODENT_HOMOPHONE = 1 << 4
+_BIT_RODENT_OPEN_VERB = 1 << 5
+_BIT_RODENT_NAME = 1 << 6
+_BIT_RODENT_ANIMAL = 1 << 7
+
+_CHAR_CLASS_BITS = {}
+for _words, _bit in (
+        (_RODENT_CLOSE, _BIT_RODENT_CLOSE),
+        (_RODENT_HIGH, _BIT_RODENT_HIGH),
+        (_RODENT_LOW, _BIT_RODENT_LOW),
+        (_RODENT_OPEN, _BIT_RODENT_OPEN),
+        (_RODENT_HOMOPHONES, _BIT_RODENT_HOMOPHONE),
+        (_RODENT_OPEN_VERBS, _BIT_RODENT_OPEN_VERB),
+        (_RODENT_NAMES, _BIT_RODENT_NAME),
+        (_RODENT_ANIMALS, _BIT_RODENT_ANIMAL),
+):
+    for _word in _words:
+        _CHAR_CLASS_BITS[_word[0]] = _CHAR_CLASS_BITS.get(_word[0], 0) | _bit
+del _words, _bit, _word
+
+
+def _char_class_bits(text):
+    """单次遍历文本，返回其中出现的关键词字符类位图"""
+    bits = 0
+    for char in text:
+        bits |= _CHAR_CLASS_BITS.get(char, 0)
+    return bits
+
+
+def _ngram_set(text, nmin=1, nmax=_NGRAM_MAX):
+    """生成文本中长度为 nmin~nmax 的全部子串，与关键词集合求交集即可代替逐个 in 判断"""
+    length = len(text)
+    return {text[i:i + n] for n in range(nmin, nmax + 1) for i in range(length - n + 1)}
+
+# 设备控制关键词（顺序即日志中报告的优先顺序）
+_DEVICE_CONTROL_KEYWORDS = (
+    '温度', '湿度', '调节温度', '设置温度', '升温', '降温', '调温',
+    '度', '摄氏度', '调到', '调制', '调至', '设置为',
+    '通风', '空调', '换气', '空气',
+    '关闭柜子', '关柜子', '关掉柜子', '关上柜子', '关毕柜子', '完毕柜子',
+    '打开柜子', '开柜子', '开启柜子', '拉开柜子',
+    '关闭档案柜', '关档案柜', '打开档案柜', '开档案柜',
+    '关闭相子', '关相子', '关闭箱子', '关箱子',
+    '状态', '查询状态', '查看状态',
+    # 空调相关关键词
+    '空调', '制冷', '制热', '除湿','开机', '关机',
+    # 加湿器相关关键词 - 扩展
+    '加湿器', '除湿', '净化', '加湿', '一体机', '温湿度一体机', '湿度一体机', '温度一体机',
+    # 除鼠器相关关键词 - 大幅扩展
+    '除鼠器', '驱鼠器', '老鼠', "打开除鼠器", '驱鼠', '低频', '高频', '总开关关闭',
+    # 同音字和变体
+    '出除数', '出鼠器', '储鼠器', '出鼠', '鼠器', '鼠设备', '老鼠器','楚楚','楚鼠'
+    '打鼠器', '灭鼠器', '防鼠器', '抗鼠器',
+    '树器', '数器', '开树器', '开数器',
+    '开老鼠', '开大老鼠', '开小老鼠', '开耗子',
+    '开鼠', '打鼠', '开树', '打树', '开数', '打数',
+    '鼠', '树', '数',  # 单独的字也要识别
+)
+# 关键词 -> 首次出现的位置，命中多个时按原列表顺序取第一个
+_DEVICE_CONTROL_ORDER = {word: index for index, word in reversed(tuple(enumerate(_DEVICE_CONTROL_KEYWORDS)))}
+_DEVICE_CONTROL_NGRAM_MAX = max(len(word) for word in _DEVICE_CONTROL_ORDER)
+_COLUMN_MARKS = frozenset('第列')
+_OPEN_CLOSE_MARKS = frozenset('开关')
+_SINGLE_ACTIONS = frozenset({'打开', '开启', '启动', '关闭', '关', '关掉', '停止'})
+
+# 聊天备用回复话题：关键词 -> 话题（话题优先级见 _get_smart_fallback_response）
+_FALLBACK_TOPIC_KEYWORDS = {
+    '笑话': 'joke', '搞笑': 'joke', '幽默': 'joke', '笑': 'joke',
+    '天气': 'weather', '温度': 'weather', '冷': 'weather', '热': 'weather',
+    '时间': 'time', '几点': 'time', '日期': 'time',
+    '你好': 'greeting', '您好': 'greeting', 'hello': 'greeting', 'hi': 'greeting',
+    '谢谢': 'thanks', '感谢': 'thanks',
+}
+_FALLBACK_TOPIC_NGRAM_MAX = max(len(word) for word in _FALLBACK_TOPIC_KEYWORDS)
+
+# 中文数字到阿拉伯数字的映射（零~三十），温度和列号提取共用
+_CN_TO_DIGIT_STR = {
+    '零': '0', '一': '1', '二': '2', '两': '2', '三': '3', '四': '4', '五': '5',
+    '六': '6', '七': '7', '八': '8', '九': '9', '十': '10',
+    '十一': '11', '十二': '12', '十三': '13', '十四': '14', '十五': '15',
+    '十六': '16', '十七': '17', '十八': '18', '十九': '19', '二十': '20',
+    '二十一': '21', '二十二': '22', '二十三': '23', '二十四': '24', '二十五': '25',
+    '二十六': '26', '二十七': '27', '二十八': '28', '二十九': '29', '三十': '30'
+}
+# 列号只接受一~二十
+_CN_COLUMN_TO_DIGIT = {word: digit for word, digit in _CN_TO_DIGIT_STR.items() if word != '零' and int(digit) <= 20}
+# 选择序号（整数），额外支持"第一"~"第十"
+_CN_TO_DIGIT_INT = {
+    '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
+    '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
+    '第一': 1, '第二': 2, '第三': 3, '第四': 4, '第五': 5,
+    '第六': 6, '第七': 7, '第八': 8, '第九': 9, '第十': 10,
+    '十一': 11, '十二': 12, '十三': 13, '十四': 14, '十五': 15,
+    '十六': 16, '十七': 17, '十八': 18, '十九': 19, '二十': 20
+}
+
+# 选择序号的宽松匹配：单个中文数字（"一"只通过"第一条/第一个/首选"识别）
+_CN_SELECTION_FALLBACK = {
+    '二': 2, '两': 2, '三': 3, '四': 4, '五': 5,
+    '六': 6, '七': 7, '八': 8, '九': 9, '十': 10
+}
+
+# 温湿度控制动作对应的回复用语
+_TEMP_ACTION_TEXT = {
+    'increase': '升高温度',
+    'decrease': '降低温度',
+    'set': '调节温度到'
+}
+
+# 温度提取模式：支持中文数字和阿拉伯数字
+_TEMP_PATTERNS = tuple(re.compile(p) for p in (
+    r'(\d+)度',           # 25度
+    r'(\d+)摄氏度',        # 25摄氏度
+    r'(\d+)°',            # 25°
+    r'([零一二两三四五六七八九十]+)度',      # 二十五度
+    r'([零一二两三四五六七八九十]+)摄氏度',   # 二十五摄氏度
+    r'([零一二两三四五六七八九十]+)°'        # 二十五°
+))
+_TEMP_NUMERALS = frozenset('零一二两三四五六七八九十')
+
+# 列号提取前的同音字纠正：相子/箱子/贵子 -> 柜子，一次替换代替三次 replace
+_COLUMN_TYPO_PATTERN = re.compile('相子|箱子|贵子')
+
+# 列号提取模式：支持错别字和更灵活的表达
+_COLUMN_PATTERNS = tuple(re.compile(p) for p in (
+    r'第([一二两三四五六七八九十]+)[列柜箱相贵]',      # 第二列/第二柜/第二箱（容错）
+    r'([一二两三四五六七八九十]+)[列柜箱相贵]',        # 三列/三柜（容错）
+    r'第(\d+)[列柜箱相贵]',                          # 第2列/第2柜（容错）
+    r'(\d+)[列柜箱相贵]',                            # 3列/3柜（容错）
+    r'第([一二两三四五六七八九十]+)号',               # 第二号
+    r'([一二两三四五六七八九十]+)号',                 # 三号
+    r'第(\d+)号',                                   # 第2号
+    r'(\d+)号',                                     # 3号
+    r'打开([一二两三四五六七八九十]+)',               # 打开二
+    r'打开(\d+)',                                   # 打开2
+    r'开([一二两三四五六七八九十]+)',                 # 开二
+    r'开(\d+)',                                     # 开2
+    r'第([一二两三四五六七八九十]+)',                 # 第三（只有数字）
+    r'第(\d+)',                                     # 第3（只有数字）
+))
+_COLUMN_NUMERALS = frozenset('一二两三四五六七八九十')
+# 所有模式（含宽松匹配）都要求至少一个数字；不含数字的文本可直接判定为无列号
+_COLUMN_HAS_NUMBER = re.compile(r'[\d一二两三四五六七八九十]')
+
+# 全部列号模式合并为一个零宽前瞻联合，一次 match 即可定位首个命中的模式（m.lastgroup -> 序号），
+# 未命中时不必再逐个 search
+_COLUMN_UNION = re.compile(
+    '|'.join(f'(?=.*?(?P<c{index}>{pattern.pattern}))' for index, pattern in enumerate(_COLUMN_PATTERNS)),
+    re.DOTALL
+)
+
+# 选择序号提取模式
+_SELECTION_PATTERNS = tuple(re.compile(p) for p in (
+    r'第([一二三四五六七八九十]+)条',
+    r'第([一二三四五六七八九十]+)个',
+    r'([一二三四五六七八九十]+)条',
+    r'([一二三四五六七八九十]+)个',
+    r'选择第([一二三四五六七八九十]+)条',
+    r'选择第([一二三四五六七八九十]+)个',
+    r'第(\d+)条',
+    r'第(\d+)个',
+    r'选择第(\d+)条',
+    r'选择第(\d+)个',
+    r'(\d+)条',
+    r'(\d+)个'
+))
+
+# 温度/列号/选择序号的解析结果按文本缓存：语音命令经常重复（"二十五度"、"第三列"）。
+# 温度和列号的解析返回 (结果, 日志消息, 日志参数)，由调用方输出日志，命中缓存时照常记录
+@lru_cache(maxsize=256)
+def _parse_temperature(text):
+    """解析温度值，未找到时返回 (None, None, ())"""
+    for pattern in _TEMP_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            number_str = match.group(1)
+
+            # 如果是中文数字，转换为阿拉伯数字
+            if number_str in _CN_TO_DIGIT_STR:
+                temperature = _CN_TO_DIGIT_STR[number_str]
+                return temperature, "✅ 中文数字转换: %s -> %s", (number_str, temperature)
+            elif number_str.isdigit():
+                return number_str, "✅ 提取到温度: %s", (number_str,)
+
+    # 如果没有匹配到模式，尝试直接提取数字
+    number_str = _first_number_run(text, _TEMP_NUMERALS)
+    if number_str:
+        if number_str in _CN_TO_DIGIT_STR:
+            temperature = _CN_TO_DIGIT_STR[number_str]
+            return temperature, "✅ 宽松模式中文数字转换: %s -> %s", (number_str, temperature)
+        elif number_str.isdigit():
+            return number_str, "✅ 宽松模式提取到温度: %s", (number_str,)
+
+    return None, None, ()
+
+
+@lru_cache(maxsize=256)
+def _parse_column_number(text):
+    """解析列号，未找到时返回 (None, None, ())"""
+    # 大多数消息不涉及列号，先做一次字符级预检，跳过整组模式匹配
+    if not _COLUMN_HAS_NUMBER.search(text):
+        return None, None, ()
+
+    # 首先处理常见的错别字和同音字
+    text = _COLUMN_TYPO_PATTERN.sub('柜子', text)
+
+    union_match = _COLUMN_UNION.match(text)
+    # 从首个命中的模式开始；其数字无法转换时（如"三十"）按原顺序继续尝试后续模式
+    first_index = int(union_match.lastgroup[1:]) if union_match else len(_COLUMN_PATTERNS)
+    for pattern in _COLUMN_PATTERNS[first_index:]:
+        col_match = pattern.search(text)
+        if col_match:
+            number_str = col_match.group(1)
+            # 如果是中文数字，转换为阿拉伯数字
+            column_found = None
+            if number_str in _CN_COLUMN_TO_DIGIT:
+                column_found = _CN_COLUMN_TO_DIGIT[number_str]
+            elif number_str.isdigit():
+                column_found = number_str
+
+            if column_found:
+                return column_found, "✅ 提取到列号: %s，匹配模式: %s", (column_found, pattern.pattern)
+
+    # 如果没找到，尝试更宽松的匹配：直接匹配数字
+    number_str = _first_number_run(text, _COLUMN_NUMERALS)
+    if number_str:
+        column_found = None
+        if number_str in _CN_COLUMN_TO_DIGIT:
+            column_found = _CN_COLUMN_TO_DIGIT[number_str]
+        elif number_str.isdigit():
+            column_found = number_str
+        if column_found:
+            return column_found, "✅ 宽松模式提取到列号: %s", (column_found,)
+
+    return None, None, ()
+
+
+@lru_cache(maxsize=256)
+def _parse_selection_index(text):
+    """解析选择序号（从1开始），未找到时返回None"""
+    # 直接说数字（"2"、"二"、"第三"、"十二"）时不必进入正则匹配
+    if text.isdecimal() and int(text) > 0:
+        return int(text)
+    if text in _CN_TO_DIGIT_INT:
+        return _CN_TO_DIGIT_INT[text]
+
+    for pattern in _SELECTION_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            number_str = match.group(1)
+            # 中文数字转换
+            if number_str in _CN_TO_DIGIT_INT:
+                return _CN_TO_DIGIT_INT[number_str]
+            elif number_str.isdigit():
+                return int(number_str)
+    # 简单匹配
+    if '第一条' in text or '第一个' in text or '首选' in text or '第一个' in text:
+        return 1
+    elif '第二条' in text or '第二个' in text:
+        return 2
+    elif '第三条' in text or '第三个' in text:
+        return 3
+    elif '第四条' in text or '第四个' in text:
+        return 4
+    elif '第五条' in text or '第五个' in text:
+        return 5
+    return None
+
+# 打招呼词语和"小电"的同音字
+_GREETING_WORDS = ('你好', '您好', '嗨', '嘿', '喂', '哈喽', 'hello', 'hi')
+_XIAOZHI_VARIANTS = ('小电', '小知', '小之', '小志', '小只', '小指', '小枝', '小纸', '小直', '小稚')
+
+# 只有英文打招呼词需要忽略大小写，用局部 (?i:...) 标记，汉字部分不做大小写折叠
+_WAKE_GREETING_ALTERNATION = '|'.join(
+    [word for word in _GREETING_WORDS if not word.isascii()] +
+    ['(?i:{})'.format('|'.join(word for word in _GREETING_WORDS if word.isascii()))]
+)
+
+# 匹配：打招呼词 + 0或多个任意字符 + "小电"同音字
+# 或者："小电"同音字 + 0或多个任意字符 + 打招呼词
+_WAKE_PATTERN = re.compile(
+    '({greeting}).*?({xiaozhi})|({xiaozhi}).*?({greeting})'.format(
+        greeting=_WAKE_GREETING_ALTERNATION, xiaozhi='|'.join(_XIAOZHI_VARIANTS))
+)
+
+# 唤醒词涉及的全部字符：正则必须命中一个"小电"同音字（汉字，不受大小写影响），
+# 短文本检查按原样做子串判断，所以文本与此集合不相交时两者都不可能命中
+_WAKE_CHARSET = frozenset(''.join(_GREETING_WORDS + _XIAOZHI_VARIANTS))
+
+
+# 退出命令模式（整句匹配）
+_EXIT_COMMAND_PATTERNS = tuple(re.compile(p) for p in (
+    r'^退出$', r'^结束$', r'^再见$', r'^拜拜$',
+    r'^退出系统$', r'^结束对话$', r'^关闭系统$',
+    r'^小电退出$', r'^小电再见$', r'^小电拜拜$',
+    r'^系统退出$', r'^程序退出$', r'^应用退出$',
+    r'^关闭助手$', r'^关闭语音$', r'^关闭对话$',
+    r'^停止语音$', r'^停止对话$'
+))
+
+# 选择命令的模式（整句匹配）
+_SELECTION_COMMAND_PATTERNS = tuple(re.compile(p) for p in (
+    r'^第[一二三四五六七八九十\d]+[条个项记录]$',
+    r'^选择?第[一二三四五六七八九十\d]+[条个项记录]$',
+    r'^[一二三四五六七八九十\d]+[条个项记录]$',
+    r'^选择?[一二三四五六七八九十\d]+[条个项记录]$',
+    r'^第一条$', r'^第二条$', r'^第三条$', r'^第四条$', r'^第五条$',
+    r'^第一个$', r'^第二个$', r'^第三个$', r'^第四个$', r'^第五个$',
+    r'^首选$', r'^首条$', r'^首个$', r'^第一个$', r'^第一条$',
+    r'^选择一$', r'^选择二$', r'^选择三$', r'^选择四$', r'^选择五$',
+))
+
+# 选择命令的简单模式：中文数字 + 量词
+_SELECTION_SIMPLE_PATTERNS = tuple(re.compile(p) for p in (
+    r'第[一二三四五六七八九十]+',
+    r'[一二三四五六七八九十]+[条个]'
+))
+
+# 明确的设备控制命令模式（包含同音字）
+_EXPLICIT_DEVICE_PATTERNS = tuple(re.compile(p) for p in (
+    # 打开柜子相关
+    r'打开第?[一二两三四五六七八九十\d]+列?柜子',
+    r'打开柜子',
+    r'开启柜子',
+    r'启动柜子',
+    # 🔥 新增：支持不完整的打开命令
+    r'打开第?[一二两三四五六七八九十\d]+列?',
+    r'打开第?[一二两三四五六七八九十\d]+',
+    # 关闭柜子相关
+    r'关闭第?[一二两三四五六七八九十\d]+列?柜子',
+    r'关闭柜子',
+    r'关柜子',
+    r'关掉柜子',
+    # 通风相关
+    r'打开通风',
+    r'开启通风',
+    r'关闭通风',
+    r'关通风',
+    # 空调相关
+    r'打开?空调',
+    r'关闭?空调',
+    r'空调开机',
+    r'空调关机',
+    r'空调制冷',
+    r'空调制热',
+    r'空调除湿',
+    r'制冷\d+度',
+    r'制热\d+度',
+    r'除湿\d+度',
+    r'空调调到\d+度',
+    r'空调设置为\d+度',
+    # 加湿器控制相关 - 扩展
+    r'打开?加湿器',
+    r'关闭?加湿器',
+    r'加湿器开机',
+    r'加湿器关机',
+    r'开启除湿',
+    r'关闭除湿',
+    r'开启净化',
+    r'关闭净化',
+    r'开启加湿',
+    r'关闭加湿',
+    r'打开一体机',
+    r'关闭一体机',
+    r'打开温湿度一体机',
+    r'关闭温湿度一体机',
+    r'打开温度一体机',
+    r'关闭温度一体机',
+    r'打开湿度一体机',
+    r'关闭湿度一体机',
+    # 除鼠器控制相关 - 更新
+    r'关闭?除鼠器',
+    r'除鼠器关闭',
+    r'除鼠器低频',
+    r'除鼠器高频',
+    r'打开除鼠器',
+    r'打开除鼠设备',
+    r'打开驱鼠设备',
+    r'低频模式',
+    r'高频模式',
+    r'总开关关闭',
+    # 同音字版本
+    r'关闭?出除数',
+    r'关闭?出鼠器',
+    r'打开出除数',
+    r'打开出鼠器',
+    r'打开楚楚',
+    r'除鼠设备',
+    r'驱鼠设备',
+    r'高品模式',
+    r'高平模式',
+    r'低品模式',
+    r'低平模式',
+    # 温度调节相关
+    r'温度调到[一二两三四五六七八九十\d]+度',
+    r'温度设置为[一二两三四五六七八九十\d]+度',
+    r'调节温度到[一二两三四五六七八九十\d]+度',
+    # 状态查询
+    r'查询状态',
+    r'查看状态',
+    r'状态查询',
+    r'状态查看',
+))
+
+# 档案查询模式 - 扩展版本，支持名称和编号查询
+_ARCHIVE_QUERY_PATTERNS = tuple(re.compile(p) for p in (
+    # 名称查询模式
+    r'查\s*(?:询)?\s*(?:一下)?\s*档案名称为\s*(.+?)\s*的\s*(?:档案)?',
+    r'查\s*(?:询|找)?\s*(?:一下)?\s*(.+?)\s*的\s*档案',
+    r'我\s*(?:想|想要|要)\s*查\s*(?:询|找)?\s*(?:一下)?\s*(.+?)\s*的\s*档案',
+    r'查\s*(.+?)\s*的?\s*信息',
+    r'查\s*(.+?)\s*的?\s*资料',
+    r'找\s*(.+?)\s*的?\s*档案',
+    r'搜索\s*(.+?)\s*的?\s*档案',
+    r'显示\s*(.+?)\s*的?\s*信息',
+    r'显示\s*(.+?)\s*的?\s*档案',
+    r'查看\s*(.+?)\s*的?\s*档案',
+    r'查询\s*(.+?)\s*的?\s*档案',
+    r'查找\s*(.+?)\s*的?\s*档案',
+
+    # 编号查询模式
+    r'查\s*(?:询)?\s*(?:一下)?\s*档案编号为\s*(.+?)\s*的\s*(?:档案)?',
+    r'查\s*(?:询|找)?\s*(?:一下)?\s*编号\s*(.+?)\s*的\s*档案',
+    r'查\s*(?:询|找)?\s*(?:一下)?\s*编号\s*[:：]?\s*(.+?)\s*(?:的档案)?',
+    r'编号\s*(.+?)\s*的\s*档案',
+    r'编号\s*[:：]?\s*(.+?)\s*的档案',
+))
+
+_ARCHIVE_CODE_IN_TEXT = re.compile(r'编号\s*[:：]?\s*(\S+)')
+_ARCHIVE_NAME_IN_TEXT = re.compile(r'查[询找]?(.+?)(?:的?[档案信息资料])')
+# 常见档案编号格式，通常包含字母、数字、横线等
+_ARCHIVE_CODE_FORMATS = tuple(re.compile(p) for p in (
+    r'[A-Za-z0-9]+[-_][A-Za-z0-9]+',  # 带分隔符的编号
+    r'[A-Za-z]{2,}\d+',  # 字母+数字，如DA2024001
+    r'\d{4}[-_]\d{3}',  # 年-序号，如2024-001
+))
+
+# 档案编号提取模式
+_ARCHIVE_CODE_PATTERNS = tuple(re.compile(p) for p in (
+    r'档案编号为\s*(.+?)\s*的',
+    r'编号为\s*(.+?)\s*的档案',
+    r'编号\s*(.+?)\s*的档案',
+    r'编号\s*[:：]?\s*(.+?)\s*的档案',
+    r'查.*?编号\s*[:：]?\s*(.+)',
+    # 新增：处理"编号为0567"这种格式
+    r'编号为\s*(\w+)\s*档案',
+    r'编号\s*为\s*(\w+)',
+    r'编号\s*(\w+)',
+))
+
+# 档案名称提取模式
+_ARCHIVE_NAME_PATTERNS = tuple(re.compile(p) for p in (
+    r'档案名称为\s*(.+?)\s*的',
+    r'查\s*(?:询|找)?\s*(?:一下)?\s*(.+?)\s*的\s*档案',
+    r'我\s*(?:想|想要|要)\s*查\s*(?:询|找)?\s*(?:一下)?\s*(.+?)\s*的\s*档案',
+    r'查\s*(.+?)\s*的?\s*(?:信息|资料|档案)',
+))
+
+# 除鼠器"开...属"类组合模式：(正则, 日志中的模式描述)
+_RODENT_OPEN_COMBO_PATTERNS = tuple((re.compile(p), label) for p, label in (
+    (r'开[^鼠]*属', '开...属'),       # 模式1：开 + 任何字符 + 属（或同音字）
+    (r'打开[^鼠]*属', '打开...属'),   # 模式2：打开 + 任何字符 + 属（或同音字）
+    (r'开[^鼠]*鼠', '开...鼠'),       # 模式3：开 + 任何字符 + 鼠
+    (r'打[^鼠]*属', '打...属'),       # 模式4：打 + 任何字符 + 属
+    (r'打[^鼠]*鼠', '打...鼠'),       # 模式5：打 + 任何字符 + 鼠
+    (r'启动[^鼠]*属', '启动...属'),   # 模式6：启动 + 任何字符 + 属
+    (r'开启[^鼠]*属', '开启...属'),   # 模式7：开启 + 任何字符 + 属
+))
+
+
+# cleanup() 等待活动线程结束的总时长（秒）
+_CLEANUP_JOIN_TIMEOUT = 2.0
+
+
 class CommandHandler:
     def __init__(self,  socketio=None):
         self.socketio = socketio
@@ -89,6 +771,9 @@ class CommandHandler:
             '高频': {'command': 2, 'switchOnOrOff': False}        # 高频模式
         }
 
+        # jieba分词器在首次使用时才导入和加载词典（见 jieba 属性）
+        self._jieba = None
+
         # 异步初始化耗时组件
         self.init_heavy_components_async()
 
@@ -96,15 +781,11 @@ class CommandHandler:
         """异步初始化耗时组件"""
         def init_task():
             try:
-                # 初始化jieba（相对较快）
-                self._init_jieba()
-                self.logger.info("✅ jieba分词器初始化成功")
-
                 # 异步初始化Ollama（不阻塞）
                 self.init_ollama_async()
 
             except Exception as e:
-                self.logger.error(f"❌ 异步初始化失败: {e}")
+                self.logger.error("❌ 异步初始化失败: %s", e)
 
         init_thread = threading.Thread(target=init_task, daemon=True)
         init_thread.start()
@@ -117,7 +798,7 @@ class CommandHandler:
                 # 异步测试连接，不阻塞
                 self.test_ollama_async()
             except Exception as e:
-                self.logger.error(f"❌ Ollama客户端初始化失败: {e}")
+                self.logger.error("❌ Ollama客户端初始化失败: %s", e)
                 self.ollama_client = None
 
         ollama_thread = threading.Thread(target=ollama_task, daemon=True)
@@ -132,7 +813,7 @@ class CommandHandler:
                 else:
                     self.logger.warning("⚠️ 无法连接到Ollama服务器，将使用本地命令处理")
             except Exception as e:
-                self.logger.error(f"❌ Ollama连接测试异常: {e}")
+                self.logger.error("❌ Ollama连接测试异常: %s", e)
 
         test_thread = threading.Thread(target=test_task, daemon=True)
         test_thread.start()
@@ -156,6 +837,11 @@ class CommandHandler:
             print(f"❌ 发送SocketIO消息失败: {e}")
             return False
 
+    def _dispatch(self, message_type, params, original_text, ok_msg, fail_msg):
+        """发送设备控制消息，成功返回 ok_msg，失败返回 fail_msg"""
+        if self.send_websocket_message(message_type, params, original_text):
+            return ok_msg
+        return fail_msg
 
     def _is_exit_command(self, text):
         """判断是否为退出命令 - 增强版：支持退出聊天模式"""
@@ -166,7 +852,7 @@ class CommandHandler:
         cleaned_text = self._clean_text(text)
         text_lower = cleaned_text.lower().strip()
 
-        self.logger.info(f"🔍 退出命令检测 - 原始文本: '{text}', 清洗后: '{cleaned_text}'")
+        self.logger.info("🔍 退出命令检测 - 原始文本: '%s', 清洗后: '%s'", text, cleaned_text)
 
         # 如果是聊天模式，检查是否要退出聊天
         if self.chat_mode:
@@ -186,7 +872,7 @@ class CommandHandler:
 
         for keyword in close_cabinet_keywords:
             if keyword in cleaned_text:
-                self.logger.info(f"🚫 检测到关闭柜子命令 '{keyword}'，不是退出: {cleaned_text}")
+                self.logger.info("🚫 检测到关闭柜子命令 '%s'，不是退出: %s", keyword, cleaned_text)
                 return False
 
         # 简化设备相关词汇检查
@@ -197,7 +883,7 @@ class CommandHandler:
 
         for indicator in device_indicators:
             if indicator in cleaned_text:
-                self.logger.info(f"🔧 检测到设备词汇 '{indicator}'，不是退出: {cleaned_text}")
+                self.logger.info("🔧 检测到设备词汇 '%s'，不是退出: %s", indicator, cleaned_text)
                 return False
 
         if '关闭' in cleaned_text:
@@ -206,22 +892,12 @@ class CommandHandler:
                 remaining_text = cleaned_text[close_index + 2:]
                 device_after_close = any(indicator in remaining_text for indicator in device_indicators)
                 if device_after_close:
-                    self.logger.info(f"🔧 '关闭'后面跟着设备词汇，识别为设备控制: {cleaned_text}")
+                    self.logger.info("🔧 '关闭'后面跟着设备词汇，识别为设备控制: %s", cleaned_text)
                     return False
 
-        # 退出命令模式
-        exit_patterns = [
-            r'^退出$', r'^结束$', r'^再见$', r'^拜拜$',
-            r'^退出系统$', r'^结束对话$', r'^关闭系统$',
-            r'^小电退出$', r'^小电再见$', r'^小电拜拜$',
-            r'^系统退出$', r'^程序退出$', r'^应用退出$',
-            r'^关闭助手$', r'^关闭语音$', r'^关闭对话$',
-            r'^停止语音$', r'^停止对话$'
-        ]
-
-        for pattern in exit_patterns:
-            if re.match(pattern, text_lower):
-                self.logger.info(f"🎯 模式匹配到退出命令: {cleaned_text}")
+        for pattern in _EXIT_COMMAND_PATTERNS:
+            if pattern.match(text_lower):
+                self.logger.info("🎯 模式匹配到退出命令: %s", cleaned_text)
                 return True
 
         exit_keywords = ['退出', '结束', '结束对话', '退出系统', '再见', '拜拜', '停止语音', '停止对话']
@@ -232,17 +908,17 @@ class CommandHandler:
             has_exit_indicator = any(indicator in text_lower for indicator in exit_indicators)
 
             if has_exit_indicator:
-                self.logger.info(f"🎯 系统相关'关闭'命令识别为退出: {cleaned_text}")
+                self.logger.info("🎯 系统相关'关闭'命令识别为退出: %s", cleaned_text)
                 return True
             else:
-                self.logger.info(f"🔧 '关闭'命令识别为设备控制: {cleaned_text}")
+                self.logger.info("🔧 '关闭'命令识别为设备控制: %s", cleaned_text)
                 return False
 
         if has_exit_keyword:
-            self.logger.info(f"🎯 确认为退出命令: {cleaned_text}")
+            self.logger.info("🎯 确认为退出命令: %s", cleaned_text)
             return True
 
-        self.logger.info(f"❌ 不是退出命令: {cleaned_text}")
+        self.logger.info("❌ 不是退出命令: %s", cleaned_text)
         return False
 
     def _is_device_control(self, text):
@@ -253,45 +929,23 @@ class CommandHandler:
         cleaned_text = self._clean_text(text)
         text_lower = cleaned_text.lower()
 
-        device_patterns = [
-            '温度', '湿度', '调节温度', '设置温度', '升温', '降温', '调温',
-            '度', '摄氏度', '调到', '调制', '调至', '设置为',
-            '通风', '空调', '换气', '空气',
-            '关闭柜子', '关柜子', '关掉柜子', '关上柜子', '关毕柜子', '完毕柜子',
-            '打开柜子', '开柜子', '开启柜子', '拉开柜子',
-            '关闭档案柜', '关档案柜', '打开档案柜', '开档案柜',
-            '关闭相子', '关相子', '关闭箱子', '关箱子',
-            '状态', '查询状态', '查看状态',
-            # 空调相关关键词
-            '空调', '制冷', '制热', '除湿','开机', '关机',
-            # 加湿器相关关键词 - 扩展
-            '加湿器', '除湿', '净化', '加湿', '一体机', '温湿度一体机', '湿度一体机', '温度一体机',
-            # 除鼠器相关关键词 - 大幅扩展
-            '除鼠器', '驱鼠器', '老鼠', "打开除鼠器", '驱鼠', '低频', '高频', '总开关关闭',
-            # 同音字和变体
-            '出除数', '出鼠器', '储鼠器', '出鼠', '鼠器', '鼠设备', '老鼠器','楚楚','楚鼠'
-            '打鼠器', '灭鼠器', '防鼠器', '抗鼠器',
-            '树器', '数器', '开树器', '开数器',
-            '开老鼠', '开大老鼠', '开小老鼠', '开耗子',
-            '开鼠', '打鼠', '开树', '打树', '开数', '打数',
-            '鼠', '树', '数',  # 单独的字也要识别
-        ]
-
-        for pattern in device_patterns:
-            if pattern in cleaned_text:
-                self.logger.info(f"🔧 直接匹配设备控制模式: {pattern}")
-                return True
+        # 一次生成全部子串，与关键词表求交集代替逐个 in 扫描
+        grams = _ngram_set(cleaned_text, nmax=_DEVICE_CONTROL_NGRAM_MAX)
+        matched = grams & _DEVICE_CONTROL_ORDER.keys()
+        if matched:
+            pattern = min(matched, key=_DEVICE_CONTROL_ORDER.get)
+            self.logger.info("🔧 直接匹配设备控制模式: %s", pattern)
+            return True
 
-        if (any(word in cleaned_text for word in ['第', '列']) and
-                any(word in cleaned_text for word in ['打开', '关闭', '开', '关'])):
-            self.logger.info(f"🔧 检测到列号控制模式: {cleaned_text}")
+        if _COLUMN_MARKS & grams and _OPEN_CLOSE_MARKS & grams:
+            self.logger.info("🔧 检测到列号控制模式: %s", cleaned_text)
             return True
 
-        if cleaned_text in ['打开', '开启', '启动', '关闭', '关', '关掉', '停止']:
-            self.logger.info(f"🔧 识别为单独的打开/关闭命令: {cleaned_text}")
+        if cleaned_text in _SINGLE_ACTIONS:
+            self.logger.info("🔧 识别为单独的打开/关闭命令: %s", cleaned_text)
             return True
 
-        self.logger.info(f"❌ 不是设备控制命令: {cleaned_text}")
+        self.logger.info("❌ 不是设备控制命令: %s", cleaned_text)
         return False
 
     def process_command(self, text):
@@ -306,11 +960,11 @@ class CommandHandler:
         try:
             # 第一步：文本清洗（移除空格+基本纠正）
             cleaned_text = self._clean_text(text)
-            self.logger.info(f"🎯 处理命令 - 原始文本: '{text}', 清洗后: '{cleaned_text}'")
+            self.logger.info("🎯 处理命令 - 原始文本: '%s', 清洗后: '%s'", text, cleaned_text)
 
             # 第二步：紧急修复 - 优先检查是否为纯唤醒词
             is_pure_wakeup = self._is_pure_wakeup_call(cleaned_text)
-            self.logger.info(f"🔍 纯唤醒词检测结果: {is_pure_wakeup}")
+            self.logger.info("🔍 纯唤醒词检测结果: %s", is_pure_wakeup)
 
             if is_pure_wakeup:
                 # 如果是纯唤醒词，直接返回问候语，不进行后续处理
@@ -319,7 +973,7 @@ class CommandHandler:
 
             # 第五步：检查退出命令
             is_exit = self._is_exit_command(cleaned_text)
-            self.logger.info(f"🔍 退出命令检测结果: {is_exit}")
+            self.logger.info("🔍 退出命令检测结果: %s", is_exit)
 
             if is_exit:
                 self.logger.info("🎯 识别为退出命令")
@@ -328,7 +982,7 @@ class CommandHandler:
             # 🔥 新增：即使不在选择状态，如果文本看起来像选择命令，也尝试处理
             # 例如：第一条、第二个、选择第一个等
             if self._looks_like_selection_command(cleaned_text):
-                self.logger.info(f"🔄 检测到类似选择命令: '{cleaned_text}'")
+                self.logger.info("🔄 检测到类似选择命令: '%s'", cleaned_text)
                 return self._handle_selection(cleaned_text, text)
 
             # 第六步：状态检查和命令处理（优先处理等待用户输入的状态）
@@ -351,7 +1005,7 @@ class CommandHandler:
             return self._handle_with_ollama_enhanced(cleaned_text)
 
         except Exception as e:
-            self.logger.error(f"❌ 命令处理异常: {e}")
+            self.logger.error("❌ 命令处理异常: %s", e)
             error_msg = "处理命令时出现错误，请重试"
             return error_msg
 
@@ -360,33 +1014,15 @@ class CommandHandler:
         if not text:
             return False
 
-        # 选择命令的模式
-        selection_patterns = [
-            r'^第[一二三四五六七八九十\d]+[条个项记录]$',
-            r'^选择?第[一二三四五六七八九十\d]+[条个项记录]$',
-            r'^[一二三四五六七八九十\d]+[条个项记录]$',
-            r'^选择?[一二三四五六七八九十\d]+[条个项记录]$',
-            r'^第一条$', r'^第二条$', r'^第三条$', r'^第四条$', r'^第五条$',
-            r'^第一个$', r'^第二个$', r'^第三个$', r'^第四个$', r'^第五个$',
-            r'^首选$', r'^首条$', r'^首个$', r'^第一个$', r'^第一条$',
-            r'^选择一$', r'^选择二$', r'^选择三$', r'^选择四$', r'^选择五$',
-        ]
-
-        for pattern in selection_patterns:
-            if re.match(pattern, text):
-                self.logger.info(f"✅ 匹配到选择命令模式: {pattern} -> {text}")
+        for pattern in _SELECTION_COMMAND_PATTERNS:
+            if pattern.match(text):
+                self.logger.info("✅ 匹配到选择命令模式: %s -> %s", pattern.pattern, text)
                 return True
 
-        # 检查是否包含中文数字 + 量词的简单模式
-        simple_patterns = [
-            r'第[一二三四五六七八九十]+',
-            r'[一二三四五六七八九十]+[条个]'
-        ]
-
-        for pattern in simple_patterns:
-            match = re.search(pattern, text)
+        for pattern in _SELECTION_SIMPLE_PATTERNS:
+            match = pattern.search(text)
             if match and len(text) <= 6:  # 短文本更可能是选择命令
-                self.logger.info(f"✅ 简单模式匹配到选择命令: {pattern} -> {text}")
+                self.logger.info("✅ 简单模式匹配到选择命令: %s -> %s", pattern.pattern, text)
                 return True
 
         return False
@@ -458,7 +1094,7 @@ class CommandHandler:
 
             return None
         except Exception as e:
-            self.logger.error(f"❌ 提取选择序号失败: {e}")
+            self.logger.error("❌ 提取选择序号失败: %s", e)
             return None
 
     def _is_explicit_device_control(self, text):
@@ -550,16 +1186,9 @@ class CommandHandler:
         """退出聊天模式"""
         self.chat_mode = False
         chat_duration = time.time() - self.chat_start_time if self.chat_start_time else 0
-        self.logger.info(f"💬 退出聊天模式，持续时间: {chat_duration:.1f}秒")
-
-        responses = [
-            "好的，聊天结束啦~ 需要的时候再叫小电哦！",
-            "聊得很开心呢~ 小电先退下啦，有事随时叫我~",
-            "好的，小电去忙别的啦，想聊天了随时喊我~",
-            "聊天时间结束~ 小电继续待命，等你召唤哦~"
-        ]
+        self.logger.info("💬 退出聊天模式，持续时间: %.1f秒", chat_duration)
 
-        return random.choice(responses)
+        return random.choice(_CHAT_EXIT_RESPONSES)
 
     def _handle_dehumidifier_control_websocket(self, text, original_text):
         """处理加湿器控制 - 增强版：明确区分打开设备和模式切换"""
@@ -567,7 +1196,7 @@ class CommandHandler:
             cleaned_text = self._clean_text(text)
             text_lower = cleaned_text.lower()
 
-            self.logger.info(f"💧 处理加湿器控制命令: '{text}' -> '{cleaned_text}'")
+            self.logger.info("💧 处理加湿器控制命令: '%s' -> '%s'", text, cleaned_text)
 
             # 映射用户命令到加湿器命令
             command_info = None
@@ -646,14 +1275,14 @@ class CommandHandler:
             }, original_text)
 
             if success:
-                self.logger.info(f"✅ 加湿器控制命令发送成功: {command_info} - {response_text}")
+                self.logger.info("✅ 加湿器控制命令发送成功: %s - %s", command_info, response_text)
                 return response_text
             else:
                 error_msg = "加湿器控制命令发送失败，请稍后重试"
                 return error_msg
 
         except Exception as e:
-            self.logger.error(f"❌ 加湿器控制处理失败: {e}")
+            self.logger.error("❌ 加湿器控制处理失败: %s", e)
             error_msg = "处理加湿器控制时出现错误"
             return error_msg
 
@@ -843,53 +1472,24 @@ class CommandHandler:
         for error, correction in rodent_corrections.items():
             if error in corrected_text:
                 corrected_text = corrected_text.replace(error, correction)
-                self.logger.info(f"🎯 同音字纠正: '{error}' -> '{correction}'，文本: {text} -> {corrected_text}")
-
-        # 特殊处理：如果包含"开"+"属"相关的组合，直接认为是"打开除鼠器"
-        # 模式1：开 + 任何字符 + 属（或同音字）
-        if re.search(r'开[^鼠]*属', corrected_text):
-            corrected_text = '打开除鼠器'
-            self.logger.info(f"🎯 模式匹配替换: 检测到'开...属'模式，替换为'打开除鼠器'")
-
-        # 模式2：打开 + 任何字符 + 属（或同音字）
-        elif re.search(r'打开[^鼠]*属', corrected_text):
-            corrected_text = '打开除鼠器'
-            self.logger.info(f"🎯 模式匹配替换: 检测到'打开...属'模式，替换为'打开除鼠器'")
+                self.logger.info("🎯 同音字纠正: '%s' -> '%s'，文本: %s -> %s", error, correction, text, corrected_text)
 
-        # 模式3：开 + 任何字符 + 鼠
-        elif re.search(r'开[^鼠]*鼠', corrected_text):
-            corrected_text = '打开除鼠器'
-            self.logger.info(f"🎯 模式匹配替换: 检测到'开...鼠'模式，替换为'打开除鼠器'")
-
-        # 模式4：打 + 任何字符 + 属
-        elif re.search(r'打[^鼠]*属', corrected_text):
-            corrected_text = '打开除鼠器'
-            self.logger.info(f"🎯 模式匹配替换: 检测到'打...属'模式，替换为'打开除鼠器'")
-
-        # 模式5：打 + 任何字符 + 鼠
-        elif re.search(r'打[^鼠]*鼠', corrected_text):
-            corrected_text = '打开除鼠器'
-            self.logger.info(f"🎯 模式匹配替换: 检测到'打...鼠'模式，替换为'打开除鼠器'")
-
-        # 模式6：启动 + 任何字符 + 属
-        elif re.search(r'启动[^鼠]*属', corrected_text):
-            corrected_text = '打开除鼠器'
-            self.logger.info(f"🎯 模式匹配替换: 检测到'启动...属'模式，替换为'打开除鼠器'")
-
-        # 模式7：开启 + 任何字符 + 属
-        elif re.search(r'开启[^鼠]*属', corrected_text):
-            corrected_text = '打开除鼠器'
-            self.logger.info(f"🎯 模式匹配替换: 检测到'开启...属'模式，替换为'打开除鼠器'")
+        # 特殊处理：如果包含"开"+"属"相关的组合，直接认为是"打开除鼠器"（按顺序取第一个命中的模式）
+        for pattern, label in _RODENT_OPEN_COMBO_PATTERNS:
+            if pattern.search(corrected_text):
+                corrected_text = '打开除鼠器'
+                self.logger.info("🎯 模式匹配替换: 检测到'%s'模式，替换为'打开除鼠器'", label)
+                break
 
         # 模式8：如果文本以"打开"开头且包含"属"的同音字
         if corrected_text.startswith('打开') and any(char in corrected_text[2:] for char in ['属', '述', '束', '术', '树', '数', '署', '蜀', '薯', '暑', '书']):
             corrected_text = '打开除鼠器'
-            self.logger.info(f"🎯 模式匹配替换: '打开'开头且包含'属'的同音字，替换为'打开除鼠器'")
+            self.logger.info("🎯 模式匹配替换: '打开'开头且包含'属'的同音字，替换为'打开除鼠器'")
 
         # 模式9：如果文本以"开"开头且包含"属"的同音字
         if corrected_text.startswith('开') and any(char in corrected_text[1:] for char in ['属', '述', '束', '术', '树', '数', '署', '蜀', '薯', '暑', '书']):
             corrected_text = '打开除鼠器'
-            self.logger.info(f"🎯 模式匹配替换: '开'开头且包含'属'的同音字，替换为'打开除鼠器'")
+            self.logger.info("🎯 模式匹配替换: '开'开头且包含'属'的同音字，替换为'打开除鼠器'")
 
         return corrected_text
 
@@ -898,94 +1498,8 @@ class CommandHandler:
         if not text:
             return False
 
-        # 明确的设备控制命令模式（包含同音字）
-        explicit_patterns = [
-            # 打开柜子相关
-            r'打开第?[一二两三四五六七八九十\d]+列?柜子',
-            r'打开柜子',
-            r'开启柜子',
-            r'启动柜子',
-            # 🔥 新增：支持不完整的打开命令
-            r'打开第?[一二两三四五六七八九十\d]+列?',
-            r'打开第?[一二两三四五六七八九十\d]+',
-            # 关闭柜子相关
-            r'关闭第?[一二两三四五六七八九十\d]+列?柜子',
-            r'关闭柜子',
-            r'关柜子',
-            r'关掉柜子',
-            # 通风相关
-            r'打开通风',
-            r'开启通风',
-            r'关闭通风',
-            r'关通风',
-            # 空调相关
-            r'打开?空调',
-            r'关闭?空调',
-            r'空调开机',
-            r'空调关机',
-            r'空调制冷',
-            r'空调制热',
-            r'空调除湿',
-            r'制冷\d+度',
-            r'制热\d+度',
-            r'除湿\d+度',
-            r'空调调到\d+度',
-            r'空调设置为\d+度',
-            # 加湿器控制相关 - 扩展
-            r'打开?加湿器',
-            r'关闭?加湿器',
-            r'加湿器开机',
-            r'加湿器关机',
-            r'开启除湿',
-            r'关闭除湿',
-            r'开启净化',
-            r'关闭净化',
-            r'开启加湿',
-            r'关闭加湿',
-            r'打开一体机',
-            r'关闭一体机',
-            r'打开温湿度一体机',
-            r'关闭温湿度一体机',
-            r'打开温度一体机',
-            r'关闭温度一体机',
-            r'打开湿度一体机',
-            r'关闭湿度一体机',
-            # 除鼠器控制相关 - 更新
-            r'关闭?除鼠器',
-            r'除鼠器关闭',
-            r'除鼠器低频',
-            r'除鼠器高频',
-            r'打开除鼠器',
-            r'打开除鼠设备',
-            r'打开驱鼠设备',
-            r'低频模式',
-            r'高频模式',
-            r'总开关关闭',
-            # 同音字版本
-            r'关闭?出除数',
-            r'关闭?出鼠器',
-            r'打开出除数',
-            r'打开出鼠器',
-            r'打开楚楚',
-            r'除鼠设备',
-            r'驱鼠设备',
-            r'高品模式',
-            r'高平模式',
-            r'低品模式',
-            r'低平模式',
-            # 温度调节相关
-            r'温度调到[一二两三四五六七八九十\d]+度',
-            r'温度设置为[一二两三四五六七八九十\d]+度',
-            r'调节温度到[一二两三四五六七八九十\d]+度',
-            # 状态查询
-            r'查询状态',
-            r'查看状态',
-            r'状态查询',
-            r'状态查看',
-        ]
-
-        for pattern in explicit_patterns:
-            if re.search(pattern, text):
+        for pattern in _EXPLICIT_DEVICE_PATTERNS:
+            if pattern.search(text):
                 return True
 
         return False
@@ -998,7 +1512,9 @@ class CommandHandler:
             # 增强的同音字处理 - 将各种变体转换为标准词汇
             cleaned_text = self._correct_rodent_repeller_text(cleaned_text)
 
-            self.logger.info(f"🐭 处理除鼠器控制命令: '{text}' -> '{cleaned_text}'")
+            self.logger.info("🐭 处理除鼠器控制命令: '%s' -> '%s'", text, cleaned_text)
+            bits = _char_class_bits(cleaned_text)
+            grams = _ngram_set(cleaned_text) if bits else set()
 
             # 映射用户命令到除鼠器命令
             command_info = None
@@ -1006,60 +1522,55 @@ class CommandHandler:
 
             # 🔥 关键修改：优先匹配关闭命令
             # 关闭命令 - 匹配各种表达方式
-            if any(word in cleaned_text for word in ['关闭', '关', '关掉', '停止', '关毕', '关闭除鼠器', '关除鼠器', '关闭驱鼠', '关驱鼠',
-                                                     '关闭除鼠设备', '关闭老鼠器', '关除鼠设备', '关老鼠器']):
+            if bits & _BIT_RODENT_CLOSE and _RODENT_CLOSE & grams:
                 command_info = self.rodent_repeller_commands['关闭']
                 response_text = "正在关闭除鼠器"
 
             # 高频命令 - 只有当明确提到"高频"时才执行
-            elif any(word in cleaned_text for word in ['高频', '高频模式', '除鼠器高频', '高品', '高平', '高频率']):
+            elif bits & _BIT_RODENT_HIGH and _RODENT_HIGH & grams:
                 command_info = self.rodent_repeller_commands['高频']
                 response_text = "正在设置除鼠器为高频模式"
 
             # 低频命令 - 包括"打开除鼠器"等默认情况
-            elif any(word in cleaned_text for word in ['低频', '低频模式', '除鼠器低频', '低品', '低平', '低频率']):
+            elif bits & _BIT_RODENT_LOW and _RODENT_LOW & grams:
                 command_info = self.rodent_repeller_commands['低频']
                 response_text = "正在设置除鼠器为低频模式"
 
             # 🔥 如果没有精确匹配，优先处理"打开"相关命令
             if command_info is None:
                 # 1. 处理"打开"、"开"等动词（优先级较高）
-                if any(word in cleaned_text for word in ['打开除鼠器', '开除鼠器', '开启除鼠器', '启动除鼠器',
-                                                         '打开除鼠', '开除鼠', '开启除鼠', '启动除鼠',
-                                                         '打开老鼠器', '开老鼠器', '开启老鼠器', '启动老鼠器',
-                                                         '打开驱鼠器', '开驱鼠器', '启动驱鼠器']):
+                if bits & _BIT_RODENT_OPEN and _RODENT_OPEN & grams:
                     # 默认打开并设置为低频模式
                     command_info = self.rodent_repeller_commands['低频']
                     response_text = "正在打开除鼠器并设置为低频模式"
-                    self.logger.info(f"🎯 动词+设备名识别成功: {cleaned_text}")
+                    self.logger.info("🎯 动词+设备名识别成功: %s", cleaned_text)
 
                 # 2. 🔥 新增：处理包含"属"的同音字模式
-                elif any(char in cleaned_text for char in ['属', '述', '束', '术', '树', '数', '署', '蜀', '薯', '暑', '书']) and \
-                        any(word in cleaned_text for word in ['打开', '开', '开启', '启动']):
+                elif bits & _BIT_RODENT_HOMOPHONE and bits & _BIT_RODENT_OPEN_VERB and _RODENT_OPEN_VERBS & grams:
                     # 包含"属"的同音字和打开动作，认为是打开除鼠器
                     command_info = self.rodent_repeller_commands['低频']
                     response_text = "正在打开除鼠器并设置为低频模式"
-                    self.logger.info(f"🎯 '属'同音字+动词识别成功: {cleaned_text}")
+                    self.logger.info("🎯 '属'同音字+动词识别成功: %s", cleaned_text)
 
                 # 3. 处理设备名称但没有明确操作的情况
-                elif any(word in cleaned_text for word in ['除鼠器', '驱鼠器', '除鼠设备', '驱鼠设备', '老鼠器', '鼠器', '鼠设备']):
+                elif bits & _BIT_RODENT_NAME and _RODENT_NAMES & grams:
                     # 默认打开并设置为低频模式
                     command_info = self.rodent_repeller_commands['低频']
                     response_text = "正在打开除鼠器并设置为低频模式"
-                    self.logger.info(f"🎯 设备名识别成功: {cleaned_text}")
+                    self.logger.info("🎯 设备名识别成功: %s", cleaned_text)
 
                 # 4. 处理提到老鼠的情况 - 默认为低频
-                elif any(word in cleaned_text for word in ['老鼠', '鼠', '耗子', '大老鼠', '小老鼠']):
+                elif bits & _BIT_RODENT_ANIMAL and _RODENT_ANIMALS & grams:
                     # 默认打开并设置为低频模式
                     command_info = self.rodent_repeller_commands['低频']
                     response_text = "正在打开除鼠器并设置为低频模式"
-                    self.logger.info(f"🎯 鼠类关键词识别成功: {cleaned_text}")
+                    self.logger.info("🎯 鼠类关键词识别成功: %s", cleaned_text)
 
                 # 5. 🔥 新增：处理"楚楚"等同音字
-                elif '楚楚' in cleaned_text and any(word in cleaned_text for word in ['打开', '开', '开启', '启动']):
+                elif '楚楚' in cleaned_text and bits & _BIT_RODENT_OPEN_VERB and _RODENT_OPEN_VERBS & grams:
                     command_info = self.rodent_repeller_commands['低频']
                     response_text = "正在打开除鼠器并设置为低频模式"
-                    self.logger.info(f"🎯 '楚楚'识别成功: {cleaned_text}")
+                    self.logger.info("🎯 '楚楚'识别成功: %s", cleaned_text)
 
             # 如果仍然没有匹配到命令，返回提示
             if command_info is None:
@@ -1073,14 +1584,14 @@ class CommandHandler:
             }, original_text)
 
             if success:
-                self.logger.info(f"✅ 除鼠器控制命令发送成功: {command_info} - {response_text}")
+                self.logger.info("✅ 除鼠器控制命令发送成功: %s - %s", command_info, response_text)
                 return response_text
             else:
                 error_msg = "除鼠器控制命令发送失败，请稍后重试"
                 return error_msg
 
         except Exception as e:
-            self.logger.error(f"❌ 除鼠器控制处理失败: {e}")
+            self.logger.error("❌ 除鼠器控制处理失败: %s", e)
             error_msg = "处理除鼠器控制时出现错误"
             return error_msg
 
@@ -1088,39 +1599,30 @@ class CommandHandler:
         """获取智能备用回复"""
         user_input_lower = user_input.lower()
 
-        # 根据用户输入内容提供相关的备用回复
-        if any(word in user_input_lower for word in ['笑话', '搞笑', '幽默', '笑']):
-            jokes = [
-                "为什么档案柜不会说谎？因为它总是有'锁'在身呀！📁",
-                "问：什么档案最受欢迎？答：你正在查询的那一份呀~",
-                "有一天，档案柜对文件说：'别担心，我会好好保管你的！'",
-                "为什么电脑要去医院？因为它有'病毒'了！"
-            ]
-            return random.choice(jokes)
+        # 一次扫描得到输入涉及的全部话题，再按优先级提供相关的备用回复
+        topics = {_FALLBACK_TOPIC_KEYWORDS[gram]
+                  for gram in _ngram_set(user_input_lower, nmax=_FALLBACK_TOPIC_NGRAM_MAX)
+                  if gram in _FALLBACK_TOPIC_KEYWORDS}
+
+        if 'joke' in topics:
+            return random.choice(_JOKES)
 
-        elif any(word in user_input_lower for word in ['天气', '温度', '冷', '热']):
+        elif 'weather' in topics:
             return "小电是档案专家，天气的话建议你看看天气预报哦~ 不过我可以帮你调节室内温度！"
 
-        elif any(word in user_input_lower for word in ['时间', '几点', '日期']):
+        elif 'time' in topics:
             current_time = datetime.now().strftime("%Y年%m月%d日 %H点%M分")
             return f"现在是{current_time}，今天也是努力工作的一天呢~"
 
-        elif any(word in user_input_lower for word in ['你好', '您好', 'hello', 'hi']):
+        elif 'greeting' in topics:
             return "哎~ 你好呀！在聊天模式里我们可以畅所欲言哦~"
 
-        elif any(word in user_input_lower for word in ['谢谢', '感谢']):
+        elif 'thanks' in topics:
             return "不客气呀~ 能帮到你小电也很开心！"
 
         else:
             # 通用的友好回复
-            fallbacks = [
-                "这个问题很有趣呢~ 小电正在努力学习中！",
-                "哎呀，小电对这个问题还不太熟悉，换个话题怎么样？",
-                "我们聊点别的吧~ 比如档案管理或者设备控制？",
-                "小电还在成长中，这个问题有点难倒我了~",
-                "哈哈，这个话题好有意思，不过小电还在学习中呢~"
-            ]
-            return random.choice(fallbacks)
+            return random.choice(_FALLBACKS)
 
 
     # 修改 command_handler.py 中的 _is_archive_query_by_name 方法
@@ -1130,47 +1632,27 @@ class CommandHandler:
         if not text:
             return False
 
+        # 快速预检：不含任何锚点字符的文本不可能是档案查询，跳过后续正则扫描
+        if _ARCHIVE_GATE.isdisjoint(text):
+            return False
+
         # 使用原始文本（包含空格）进行匹配
         text_with_spaces = text
         cleaned_text = self._clean_text(text)
 
-        self.logger.info(f"🔍 档案查询检测 - 原始文本: '{text}', 清洗后: '{cleaned_text}'")
-
-        # 档案查询模式 - 扩展版本，支持名称和编号查询
-        archive_patterns = [
-            # 名称查询模式
-            r'查\s*(?:询)?\s*(?:一下)?\s*档案名称为\s*(.+?)\s*的\s*(?:档案)?',
-            r'查\s*(?:询|找)?\s*(?:一下)?\s*(.+?)\s*的\s*档案',
-            r'我\s*(?:想|想要|要)\s*查\s*(?:询|找)?\s*(?:一下)?\s*(.+?)\s*的\s*档案',
-            r'查\s*(.+?)\s*的?\s*信息',
-            r'查\s*(.+?)\s*的?\s*资料',
-            r'找\s*(.+?)\s*的?\s*档案',
-            r'搜索\s*(.+?)\s*的?\s*档案',
-            r'显示\s*(.+?)\s*的?\s*信息',
-            r'显示\s*(.+?)\s*的?\s*档案',
-            r'查看\s*(.+?)\s*的?\s*档案',
-            r'查询\s*(.+?)\s*的?\s*档案',
-            r'查找\s*(.+?)\s*的?\s*档案',
-
-            # 编号查询模式
-            r'查\s*(?:询)?\s*(?:一下)?\s*档案编号为\s*(.+?)\s*的\s*(?:档案)?',
-            r'查\s*(?:询|找)?\s*(?:一下)?\s*编号\s*(.+?)\s*的\s*档案',
-            r'查\s*(?:询|找)?\s*(?:一下)?\s*编号\s*[:：]?\s*(.+?)\s*(?:的档案)?',
-            r'编号\s*(.+?)\s*的\s*档案',
-            r'编号\s*[:：]?\s*(.+?)\s*的档案',
-        ]
+        self.logger.info("🔍 档案查询检测 - 原始文本: '%s', 清洗后: '%s'", text, cleaned_text)
 
         # 尝试匹配各种档案查询模式
         archive_match = None
-        for pattern in archive_patterns:
-            archive_match = re.search(pattern, text_with_spaces)
+        for pattern in _ARCHIVE_QUERY_PATTERNS:
+            archive_match = pattern.search(text_with_spaces)
             if archive_match:
-                self.logger.info(f"✅ 档案查询匹配成功，模式: {pattern}")
+                self.logger.info("✅ 档案查询匹配成功，模式: %s", pattern.pattern)
                 break
 
         if archive_match:
             query_value = archive_match.group(1).strip()
-            self.logger.info(f"📌 提取到查询值: {query_value}")
+            self.logger.info("📌 提取到查询值: %s", query_value)
             return True
 
         # 扩展匹配模式，支持更多表达方式
@@ -1184,37 +1666,30 @@ class CommandHandler:
         if has_archive_keyword and has_info_keyword:
             # 尝试提取查询值（可能是名称或编号）
             # 先尝试提取编号
-            code_match = re.search(r'编号\s*[:：]?\s*(\S+)', cleaned_text)
+            code_match = _ARCHIVE_CODE_IN_TEXT.search(cleaned_text)
             if code_match:
                 query_value = code_match.group(1).strip()
                 if query_value:
-                    self.logger.info(f"📌 提取到档案编号: {query_value}")
+                    self.logger.info("📌 提取到档案编号: %s", query_value)
                     return True
 
             # 尝试提取档案名称
-            name_match = re.search(r'查[询找]?(.+?)(?:的?[档案信息资料])', cleaned_text)
+            name_match = _ARCHIVE_NAME_IN_TEXT.search(cleaned_text)
             if name_match:
                 name = name_match.group(1).strip()
                 if name and len(name) >= 2:  # 至少2个字符
-                    self.logger.info(f"📌 提取到档案名称: {name}")
+                    self.logger.info("📌 提取到档案名称: %s", name)
                     return True
 
         # 简单匹配：包含"查询"和常见档案编号格式
         # 档案编号通常包含字母、数字、横线等
         if '查询' in cleaned_text or '查' in cleaned_text:
-            # 尝试匹配常见的编号格式
-            # 格式如：2024-001, ABC123, DA-2024-001等
-            code_formats = [
-                r'[A-Za-z0-9]+[-_][A-Za-z0-9]+',  # 带分隔符的编号
-                r'[A-Za-z]{2,}\d+',  # 字母+数字，如DA2024001
-                r'\d{4}[-_]\d{3}',  # 年-序号，如2024-001
-            ]
-
-            for pattern in code_formats:
-                code_match = re.search(pattern, cleaned_text)
+            # 尝试匹配常见的编号格式，如：2024-001, ABC123, DA-2024-001等
+            for pattern in _ARCHIVE_CODE_FORMATS:
+                code_match = pattern.search(cleaned_text)
                 if code_match:
                     code = code_match.group()
-                    self.logger.info(f"📌 检测到档案编号格式: {code}")
+                    self.logger.info("📌 检测到档案编号格式: %s", code)
                     return True
 
         # 如果文本较短，直接作为查询值
@@ -1224,7 +1699,7 @@ class CommandHandler:
                 if keyword in cleaned_text:
                     query_value = cleaned_text.replace(keyword, "").strip()
                     if query_value and len(query_value) >= 2:
-                        self.logger.info(f"📌 短文本作为查询值: {query_value}")
+                        self.logger.info("📌 短文本作为查询值: %s", query_value)
                         return True
 
         return False
@@ -1235,7 +1710,7 @@ class CommandHandler:
             text_with_spaces = original_text  # 使用原始文本进行匹配
             cleaned_text = self._clean_text(text)
 
-            self.logger.info(f"📁 处理档案查询: '{text}' -> '{cleaned_text}'")
+            self.logger.info("📁 处理档案查询: '%s' -> '%s'", text, cleaned_text)
 
             # 提取查询值（可能是名称或编号）
             query_value = self._extract_archive_query_value(text_with_spaces, cleaned_text)
@@ -1244,7 +1719,7 @@ class CommandHandler:
                 return "请告诉我您要查询什么档案？例如：查询张三的档案，或者查询编号2024-001的档案"
 
             # 🔥 关键修改：只发送查询意图给前端，不查询数据库
-            self.logger.info(f"📤 发送查询意图到前端: {query_value}")
+            self.logger.info("📤 发送查询意图到前端: %s", query_value)
 
             # 发送WebSocket消息给前端，告知用户正在查询档案
             success = self.send_websocket_message('query_record', {
@@ -1265,22 +1740,17 @@ class CommandHandler:
                     'last_query_results': []  # 暂时为空，由前端填充
                 })
 
-                self.logger.info(f"✅ 设置等待选择状态: {self.conversation_state['expecting_selection']}")
+                self.logger.info("✅ 设置等待选择状态: %s", self.conversation_state['expecting_selection'])
 
                 # 返回友好的响应，提示用户可以选择
-                responses = [
-                    f"好的，正在为您查询档案信息，请稍后...",
-                    f"收到，马上为您查找档案,请稍后...",
-                    f"正在查询的档案，请稍等..."
-                ]
-                response = random.choice(responses)
+                response = random.choice(_ARCHIVE_ACK)
                 return response
             else:
                 error_msg = "查询请求发送失败，请稍后重试"
                 return error_msg
 
         except Exception as e:
-            self.logger.error(f"❌ 档案查询处理失败: {e}")
+            self.logger.error("❌ 档案查询处理失败: %s", e)
             error_msg = "处理查询时出现错误"
             return error_msg
 
@@ -1288,113 +1758,74 @@ class CommandHandler:
         """提取档案查询值（名称或编号）- 增强版：处理语音识别错误和口吃"""
         try:
             # 首先尝试匹配明确的编号查询
-            code_patterns = [
-                r'档案编号为\s*(.+?)\s*的',
-                r'编号为\s*(.+?)\s*的档案',
-                r'编号\s*(.+?)\s*的档案',
-                r'编号\s*[:：]?\s*(.+?)\s*的档案',
-                r'查.*?编号\s*[:：]?\s*(.+)',
-                # 新增：处理"编号为0567"这种格式
-                r'编号为\s*(\w+)\s*档案',
-                r'编号\s*为\s*(\w+)',
-                r'编号\s*(\w+)',
-            ]
-
-            for pattern in code_patterns:
-                match = re.search(pattern, text_with_spaces)
+            for pattern in _ARCHIVE_CODE_PATTERNS:
+                match = pattern.search(text_with_spaces)
                 if match:
                     code = match.group(1).strip()
                     if code:
                         # 清理code中的非编号字符
                         # 移除"档案"、"呃"、"干"、"为"等干扰词
-                        code = re.sub(r'[档案呃干为。，、]', '', code)
-
-                        # 处理重复部分：查找数字并取最长连续数字
-                        # 从code中提取所有数字序列
-                        numbers = re.findall(r'\d+', code)
-                        if numbers:
-                            # 取最长的数字序列
-                            longest_number = max(numbers, key=len)
-                            self.logger.info(f"📌 模式匹配提取到档案编号: {longest_number}")
+                        code = code.translate(_ARCHIVE_DROP)
+
+                        # 处理重复部分：取最长的连续数字序列
+                        longest_number = _longest_digit_run(code)
+                        if longest_number:
+                            self.logger.info("📌 模式匹配提取到档案编号: %s", longest_number)
                             return longest_number
                         else:
                             # 如果没有数字，直接返回清理后的code
-                            self.logger.info(f"📌 模式匹配提取到档案编号: {code}")
+                            self.logger.info("📌 模式匹配提取到档案编号: %s", code)
                             return code
 
             # 直接在原始文本中查找连续的数字串
             # 优先查找4位及以上数字（比如0567）
-            number_pattern = r'\b(\d{3,})\b'
-            number_matches = re.findall(number_pattern, text_with_spaces)
+            longest_number = _longest_digit_run(text_with_spaces, _LONG_DIGIT_RUN)
 
-            if number_matches:
-                # 选择最长的数字串
-                longest_number = max(number_matches, key=len)
-                self.logger.info(f"📌 提取到最长数字串作为编号: {longest_number}")
+            if longest_number:
+                self.logger.info("📌 提取到最长数字串作为编号: %s", longest_number)
                 return longest_number
 
             # 如果没找到3位以上数字，尝试查找任何数字
-            any_number_pattern = r'(\d+)'
-            any_number_matches = re.findall(any_number_pattern, text_with_spaces)
+            longest_number = _longest_digit_run(text_with_spaces)
 
-            if any_number_matches:
-                # 选择最长的数字串
-                longest_number = max(any_number_matches, key=len)
-                self.logger.info(f"📌 提取到数字作为编号: {longest_number}")
+            if longest_number:
+                self.logger.info("📌 提取到数字作为编号: %s", longest_number)
                 return longest_number
 
             # 尝试匹配名称查询
-            name_patterns = [
-                r'档案名称为\s*(.+?)\s*的',
-                r'查\s*(?:询|找)?\s*(?:一下)?\s*(.+?)\s*的\s*档案',
-                r'我\s*(?:想|想要|要)\s*查\s*(?:询|找)?\s*(?:一下)?\s*(.+?)\s*的\s*档案',
-                r'查\s*(.+?)\s*的?\s*(?:信息|资料|档案)',
-            ]
-
-            for pattern in name_patterns:
-                match = re.search(pattern, text_with_spaces)
+            for pattern in _ARCHIVE_NAME_PATTERNS:
+                match = pattern.search(text_with_spaces)
                 if match:
                     name = match.group(1).strip()
                     if name:
                         # 清理名字中的干扰词
-                        name = re.sub(r'[档案呃干为。，、]', '', name)
+                        name = name.translate(_ARCHIVE_DROP)
                         if name and len(name) >= 2:  # 至少2个字符
-                            self.logger.info(f"📌 提取到档案名称: {name}")
+                            self.logger.info("📌 提取到档案名称: %s", name)
                             return name
 
             # 如果以上都没提取到，尝试从清洗后的文本中提取
-            # 移除常见的查询前缀
-            query_prefixes = ['查询', '查一下', '查找', '搜索', '查', '找', '编号', '档案编号']
-            remaining_text = cleaned_text
-            for prefix in query_prefixes:
-                if remaining_text.startswith(prefix):
-                    remaining_text = remaining_text[len(prefix):]
-                    break
-
-            # 移除常见的后缀
-            query_suffixes = ['的档案', '档案', '的信息', '的资料', '为', '呃', '干']
-            for suffix in query_suffixes:
-                if remaining_text.endswith(suffix):
-                    remaining_text = remaining_text[:-len(suffix)]
+            # 移除常见的查询前缀和后缀
+            remaining_text = _ARCHIVE_PREFIX_PATTERN.sub('', cleaned_text, count=1)
+            remaining_text = _ARCHIVE_SUFFIX_PATTERN.sub('', remaining_text, count=1)
 
             # 清理空白字符
             remaining_text = remaining_text.strip()
 
             if remaining_text:
                 # 尝试从剩余文本中提取数字
-                numbers_in_remaining = re.findall(r'\d+', remaining_text)
-                if numbers_in_remaining:
-                    longest_number = max(numbers_in_remaining, key=len)
-                    self.logger.info(f"📌 从剩余文本中提取数字编号: {longest_number}")
+                longest_number = _longest_digit_run(remaining_text)
+                if longest_number:
+                    self.logger.info("📌 从剩余文本中提取数字编号: %s", longest_number)
                     return longest_number
 
-                self.logger.info(f"📌 从剩余文本中提取查询值: {remaining_text}")
+                self.logger.info("📌 从剩余文本中提取查询值: %s", remaining_text)
                 return remaining_text
 
             return None
 
         except Exception as e:
-            self.logger.error(f"❌ 提取档案查询值失败: {e}")
+            self.logger.error("❌ 提取档案查询值失败: %s", e)
             return None
 
     def _handle_with_ollama_enhanced(self, text):
@@ -1413,14 +1844,14 @@ class CommandHandler:
                 self.send_websocket_message('ai_response', {'response': response}, text)
                 return response
 
-            self.logger.info(f"🚀 增强AI处理: {text}")
+            self.logger.info("🚀 增强AI处理: %s", text)
 
             # 直接使用AI处理，不进行语义纠正
             ollama_response = self.ollama_client.send_chat_message(text)
 
             # 直接使用AI的回复，不进行额外过滤或处理
             if ollama_response:
-                self.logger.info(f"✅ AI处理成功: {ollama_response}")
+                self.logger.info("✅ AI处理成功: %s", ollama_response)
                 # 发送WebSocket消息
                 self.send_websocket_message('ai_response', {'response': ollama_response}, text)
                 return ollama_response
@@ -1432,7 +1863,7 @@ class CommandHandler:
                 return response
 
         except Exception as e:
-            self.logger.error(f"❌ AI处理异常: {e}")
+            self.logger.error("❌ AI处理异常: %s", e)
             response = "处理请求时出现错误，请检查AI服务状态"
             # 发送WebSocket消息
             self.send_websocket_message('ai_response', {'response': response}, text)
@@ -1440,7 +1871,7 @@ class CommandHandler:
 
     def _handle_exit_command(self, text, original_text=None):
         """处理退出命令 - 增强版：支持退出聊天模式"""
-        self.logger.info(f"🚪 执行退出命令处理: {text}")
+        self.logger.info("🚪 执行退出命令处理: %s", text)
 
         # 如果在聊天模式中，先退出聊天模式
         if self.chat_mode:
@@ -1460,13 +1891,7 @@ class CommandHandler:
 
         self.is_exited = True
 
-        responses = [
-            "好的，小电先退下啦，需要的时候随时叫我~",
-            "再见啦，有事随时喊小电哦~",
-            "小电去休息啦，想我了就说'小电'~",
-            "好的，下次见~ 记得叫'小电'唤醒我哦~"
-        ]
-        response = random.choice(responses)
+        response = random.choice(_EXIT_RESPONSES)
 
         # 重置对话状态
         self.reset_conversation_state()
@@ -1478,56 +1903,22 @@ class CommandHandler:
         if not text:
             return ""
 
-        # 第一步：移除表情符号和特殊符号
-        # 匹配常见的表情符号和特殊字符
-        cleaned = re.sub(r'[^\w\u4e00-\u9fa5\s]', '', text)
-
-        # 第二步：移除常见的语气词和干扰词
-        filler_words = [
-            '啊', '呢', '吧', '呀', '哦', '嗯', '那个', '这个', '然后', '就是',
-            '啦', '嘛', '哟', '呃', '哎', '喂', '哈', '哼', '哇', '呐'
-        ]
-
-        # 移除语气词
-        for word in filler_words:
-            cleaned = cleaned.replace(word, "")
-
-        # 第三步：修正常见的语音识别错误 - 增强设备控制相关修正
-        common_errors = {
-            '相子': '柜子',
-            '箱子': '柜子',
-            '贵子': '柜子',
-            '柜了': '柜子',
-            '柜勒': '柜子',
-            '柜啦': '柜子',
-            '关毕': '关闭',
-            '完毕': '关闭',
-            '关掉': '关闭',
-            '打开': '打开',
-            '开启': '打开',
-            '关闭': '关闭',
-            '停止': '关闭',
-            '类': '列',
-        }
+        # 第一遍：移除表情符号、特殊符号和语气词
+        cleaned = _CLEAN_NOISE_PATTERN.sub('', text)
 
-        # 关键修复：先修正常见错误，再处理空格
-        for error, correction in common_errors.items():
-            cleaned = cleaned.replace(error, correction)
-
-        # 第四步：移除所有空格
-        cleaned = re.sub(r'\s+', '', cleaned).strip()
+        # 第二遍：修正常见的语音识别错误并移除所有空格
+        cleaned = _CLEAN_FIX_PATTERN.sub(_clean_fix_repl, cleaned).strip()
 
         # 记录清洗前后的文本
         if text != cleaned:
-            self.logger.info(f"🧹 文本清洗: '{text}' -> '{cleaned}'")
+            self.logger.info("🧹 文本清洗: '%s' -> '%s'", text, cleaned)
 
         return cleaned
 
     def _handle_device_control_websocket(self, text, original_text):
         """处理设备控制命令 - 严格按照app.py的WebSocket格式"""
         try:
-            text_lower = text.lower()
-            self.logger.info(f"🔧 处理设备控制命令: {text}")
+            self.logger.info("🔧 处理设备控制命令: %s", text)
 
             # 处理单独的"打开"或"关闭"命令
             if text in ['打开', '开启', '启动']:
@@ -1539,58 +1930,19 @@ class CommandHandler:
                 self.send_websocket_message('ai_response', {'response': response}, original_text)
                 return response
 
-            # 加湿器控制 - 优先处理
-            elif any(word in text_lower for word in ['加湿器', '除湿', '净化', '加湿']):
-                self.logger.info("💧 识别为加湿器控制命令")
-                return self._handle_dehumidifier_control_websocket(text, original_text)
-
-            # 空调控制
-            elif any(word in text_lower for word in ['空调', '制冷', '制热']):
-                self.logger.info("❄️ 识别为空调控制命令")
-                return self._handle_air_conditioner_control_websocket(text, original_text)
-
-            # 除鼠器控制 - 新增
-            elif any(word in text_lower for word in ['除鼠器', '驱鼠器', '除鼠', '驱鼠', '老鼠']):
-                self.logger.info("🐭 识别为除鼠器控制命令")
-                return self._handle_rodent_repeller_control_websocket(text, original_text)
-
-            # 温湿度控制
-            temperature_keywords = ['温度', '湿度', '调节', '设置', '度', '调到', '调制', '调至']
-            if any(word in text_lower for word in temperature_keywords):
-                self.logger.info("🌡️ 识别为温湿度控制命令")
-                return self._handle_temperature_control_websocket(text, original_text)
-
-            # 通风控制
-            elif any(word in text_lower for word in ['通风', '换气']):
-                self.logger.info("💨 识别为通风控制命令")
-                return self._handle_ventilation_control_websocket(text, original_text)
-
-            # 档案柜控制 - 更精确的匹配
-            cabinet_keywords = ['柜子', '档案柜', '相子', '箱子', '贵子', '柜了']
-            has_cabinet_keyword = any(word in text for word in cabinet_keywords)
-
-            # 只有当明确提到柜子相关词汇时才认为是档案柜控制
-            if has_cabinet_keyword:
-                self.logger.info("📁 识别为档案柜控制命令")
-                return self._handle_cabinet_control_websocket(text, original_text)
-
-            # 或者包含列号的操作（如"打开第三列"）
-            elif any(word in text for word in ['第', '列']) and any(word in text for word in ['打开', '关闭', '开', '关']):
-                self.logger.info("📁 识别为带列号的柜子控制命令")
-                return self._handle_cabinet_control_websocket(text, original_text)
-
-            # 状态查询
-            elif any(word in text_lower for word in ['状态', '查看', '监控']):
-                self.logger.info("📊 识别为状态查询命令")
-                return self._handle_status_query_websocket(text, original_text)
+            # 一次匹配得到优先级最高的设备意图
+            intent_match = _DEVICE_INTENT_UNION.match(text)
+            if intent_match:
+                handler_name, log_message = _DEVICE_INTENT_HANDLERS[intent_match.lastgroup]
+                self.logger.info(log_message)
+                return getattr(self, handler_name)(text, original_text)
 
             # 默认使用AI处理
-            else:
-                self.logger.info("🤖 未明确匹配设备类型，使用AI处理")
-                return self._handle_with_ollama_directly(text)
+            self.logger.info("🤖 未明确匹配设备类型，使用AI处理")
+            return self._handle_with_ollama_directly(text)
 
         except Exception as e:
-            self.logger.error(f"❌ 设备控制处理失败: {e}")
+            self.logger.error("❌ 设备控制处理失败: %s", e)
             error_msg = "处理设备控制时出现错误"
             return error_msg
 
@@ -1600,19 +1952,20 @@ class CommandHandler:
             cleaned_text = self._clean_text(text)
             text_lower = cleaned_text.lower()
 
-            self.logger.info(f"💧 处理加湿器控制命令: '{text}' -> '{cleaned_text}'")
+            self.logger.info("💧 处理加湿器控制命令: '%s' -> '%s'", text, cleaned_text)
+            grams = _ngram_set(cleaned_text)
 
             # 映射用户命令到加湿器命令
             command_info = None
             response_text = ""
 
             # 开机命令
-            if any(word in cleaned_text for word in ['开机', '打开加湿器', '启动加湿器']):
+            if _HUMIDIFIER_ON & grams:
                 command_info = self.dehumidifier_commands['开机']
                 response_text = "正在为您打开加湿器"
 
             # 关机命令
-            elif any(word in cleaned_text for word in ['关机', '关闭加湿器', '关加湿器']):
+            elif _HUMIDIFIER_OFF & grams:
                 command_info = self.dehumidifier_commands['关机']
                 response_text = "正在为您关闭加湿器"
 
@@ -1633,11 +1986,11 @@ class CommandHandler:
 
             # 如果没有精确匹配，尝试智能匹配
             if command_info is None:
-                if any(word in cleaned_text for word in ['打开', '开启', '启动']):
+                if _OPEN_VERBS & grams:
                     # 默认开机
                     command_info = self.dehumidifier_commands['开机']
                     response_text = "正在为您打开加湿器"
-                elif any(word in cleaned_text for word in ['关闭', '关', '关掉']):
+                elif _CLOSE_VERBS & grams:
                     # 默认关机
                     command_info = self.dehumidifier_commands['关机']
                     response_text = "正在为您关闭加湿器"
@@ -1656,14 +2009,14 @@ class CommandHandler:
             }, original_text)
 
             if success:
-                self.logger.info(f"✅ 加湿器控制命令发送成功: {command_info} - {response_text}")
+                self.logger.info("✅ 加湿器控制命令发送成功: %s - %s", command_info, response_text)
                 return response_text
             else:
                 error_msg = "加湿器控制命令发送失败，请稍后重试"
                 return error_msg
 
         except Exception as e:
-            self.logger.error(f"❌ 加湿器控制处理失败: {e}")
+            self.logger.error("❌ 加湿器控制处理失败: %s", e)
             error_msg = "处理加湿器控制时出现错误"
             return error_msg
 
@@ -1673,71 +2026,14 @@ class CommandHandler:
             cleaned_text = self._clean_text(text)
             text_lower = cleaned_text.lower()
 
-            self.logger.info(f"❄️ 处理空调控制命令: '{text}' -> '{cleaned_text}'")
-
-            # 映射用户命令到空调命令
-            command = None
-            response_text = ""
-
-            # 开机命令
-            if any(word in cleaned_text for word in ['开机', '打开空调', '启动空调']):
-                command = 0
-                response_text = "正在为您打开空调"
+            self.logger.info("❄️ 处理空调控制命令: '%s' -> '%s'", text, cleaned_text)
+            grams = _ngram_set(cleaned_text)
 
-            # 关机命令
-            elif any(word in cleaned_text for word in ['关机', '关闭空调', '关空调']):
-                command = 1
-                response_text = "正在为您关闭空调"
-
-            # 制冷命令
-            elif '制冷18' in cleaned_text or '制冷18度' in cleaned_text:
-                command = 2
-                response_text = "正在设置空调为制冷18度"
-            elif '制冷20' in cleaned_text or '制冷20度' in cleaned_text:
-                command = 3
-                response_text = "正在设置空调为制冷20度"
-            elif '制冷22' in cleaned_text or '制冷22度' in cleaned_text:
-                command = 4
-                response_text = "正在设置空调为制冷22度"
-
-            # 除湿命令
-            elif '除湿25' in cleaned_text or '除湿25度' in cleaned_text:
-                command = 5
-                response_text = "正在设置空调为除湿25度"
-
-            # 制热命令
-            elif '制热20' in cleaned_text or '制热20度' in cleaned_text:
-                command = 6
-                response_text = "正在设置空调为制热20度"
-            elif '制热22' in cleaned_text or '制热22度' in cleaned_text:
-                command = 7
-                response_text = "正在设置空调为制热22度"
-            elif '制热24' in cleaned_text or '制热24度' in cleaned_text:
-                command = 8
-                response_text = "正在设置空调为制热24度"
-
-            # 如果没有精确匹配，尝试智能匹配
-            if command is None:
-                if '制冷' in cleaned_text:
-                    # 默认制冷22度
-                    command = 4
-                    response_text = "正在设置空调为制冷22度"
-                elif '制热' in cleaned_text:
-                    # 默认制热22度
-                    command = 7
-                    response_text = "正在设置空调为制热22度"
-                elif '除湿' in cleaned_text:
-                    # 默认除湿25度
-                    command = 5
-                    response_text = "正在设置空调为除湿25度"
-                elif any(word in cleaned_text for word in ['打开', '开启', '启动']):
-                    # 默认开机
-                    command = 0
-                    response_text = "正在为您打开空调"
-                elif any(word in cleaned_text for word in ['关闭', '关', '关掉']):
-                    # 默认关机
-                    command = 1
-                    response_text = "正在为您关闭空调"
+            # 映射用户命令到空调命令：按优先级取第一个命中的规则
+            command, response_text = next(
+                ((command, response) for keywords, command, response in _AIR_CONDITIONER_RULES if keywords & grams),
+                (None, "")
+            )
 
             # 如果仍然没有匹配到命令，返回提示
             if command is None:
@@ -1752,14 +2048,14 @@ class CommandHandler:
             }, original_text)
 
             if success:
-                self.logger.info(f"✅ 空调控制命令发送成功: {command} - {response_text}")
+                self.logger.info("✅ 空调控制命令发送成功: %s - %s", command, response_text)
                 return response_text
             else:
                 error_msg = "空调控制命令发送失败，请稍后重试"
                 return error_msg
 
         except Exception as e:
-            self.logger.error(f"❌ 空调控制处理失败: {e}")
+            self.logger.error("❌ 空调控制处理失败: %s", e)
             error_msg = "处理空调控制时出现错误"
             return error_msg
 
@@ -1810,26 +2106,10 @@ class CommandHandler:
             # 如果已经有温度值，直接执行
             if temperature:
                 # 发送WebSocket消息 - 严格按照app.py格式
-                success = self.send_websocket_message('control_thermo_hygro_sensor', {
+                return self._dispatch('control_thermo_hygro_sensor', {
                     'action': action,
                     'temperature': temperature
-                }, original_text)
-                if success:
-                    action_text = {
-                        'increase': '升高温度',
-                        'decrease': '降低温度',
-                        'set': '调节温度到'
-                    }.get(action, '调节温度到')
-
-                    # 更智能友好的回复
-                    if action == 'set':
-                        response = f"好的，正在为您{action_text}{temperature}度"
-                    else:
-                        response = f"好的，正在为您{action_text}{temperature}度"
-
-                    return response
-                else:
-                    return "温湿度控制命令发送失败"
+                }, original_text, f"好的，正在为您{_TEMP_ACTION_TEXT[action]}{temperature}度", "温湿度控制命令发送失败")
 
         except Exception as e:
             print(f"❌ 温湿度控制处理失败: {e}")
@@ -1839,10 +2119,11 @@ class CommandHandler:
         """处理通风控制 - 严格按照app.py格式"""
         try:
             # 判断动作
-            if any(word in text for word in ['打开', '开启', '启动']):
+            grams = _ngram_set(text)
+            if _OPEN_VERBS & grams:
                 action = "on"
                 action_text = "开启通风系统"
-            elif any(word in text for word in ['关闭', '停止']):
+            elif _STOP_VERBS & grams:
                 action = "off"
                 action_text = "关闭通风系统"
             else:
@@ -1850,15 +2131,8 @@ class CommandHandler:
                 action_text = "调节通风系统"
 
             # 发送WebSocket消息 - 严格按照app.py格式
-            success = self.send_websocket_message('control_air_conditioner', {
-                'action': action
-            }, original_text)
-            if success:
-                # 更智能友好的回复
-                response = f"好的，正在为您{action_text}"
-                return response
-            else:
-                return "通风控制命令发送失败"
+            return self._dispatch('control_air_conditioner', {'action': action}, original_text,
+                                  f"好的，正在为您{action_text}", "通风控制命令发送失败")
         except Exception as e:
             print(f"❌ 通风控制处理失败: {e}")
             return "处理通风控制时出现错误"
@@ -1867,14 +2141,8 @@ class CommandHandler:
         """处理状态查询 - 严格按照app.py格式"""
         try:
             # 发送WebSocket消息 - 严格按照app.py格式
-            success = self.send_websocket_message('query_cabinet_status', {
-                'command': text
-            }, original_text)
-            if success:
-                response = "好的，正在为您查询设备状态，请稍候"
-                return response
-            else:
-                return "状态查询命令发送失败"
+            return self._dispatch('query_cabinet_status', {'command': text}, original_text,
+                                  "好的，正在为您查询设备状态，请稍候", "状态查询命令发送失败")
         except Exception as e:
             print(f"❌ 状态查询处理失败: {e}")
             return "处理状态查询时出现错误"
@@ -1883,30 +2151,22 @@ class CommandHandler:
         """处理档案柜控制 - 严格按照app.py格式"""
         try:
             text_lower = text.lower()
-            self.logger.info(f"📁 处理档案柜控制: '{text}'")
+            self.logger.info("📁 处理档案柜控制: '%s'", text)
 
             # 提取动作（关闭命令优先）
-            close_keywords = ['关闭', '关', '关掉', '关上', '关毕', '完毕']
-            has_close = any(keyword in text_lower for keyword in close_keywords)
+            has_close = bool(_CABINET_CLOSE & _ngram_set(text_lower))
             action = 'close' if has_close else 'open'
             action_text = "关闭" if action == 'close' else "打开"
 
             # 严格按照app.py逻辑：关闭命令不需要列号，直接关闭所有柜子
             if action == 'close':
-                # 发送关闭命令 - 严格按照app.py格式
-                success = self.send_websocket_message('close_cabinet', {
-                    'action': 'off'  # 使用'action'参数，值为'off'
-                }, original_text)
-                if success:
-                    response = "好的，正在为您关闭所有档案柜"
-                    return response
-                else:
-                    error_msg = "关闭命令发送失败，请稍后重试"
-                    return error_msg
+                # 发送关闭命令 - 严格按照app.py格式（使用'action'参数，值为'off'）
+                return self._dispatch('close_cabinet', {'action': 'off'}, original_text,
+                                      "好的，正在为您关闭所有档案柜", "关闭命令发送失败，请稍后重试")
 
             # 打开命令需要列号
             column_number = self._extract_column_number(text)
-            self.logger.info(f"🔢 提取列号结果: {column_number}")
+            self.logger.info("🔢 提取列号结果: %s", column_number)
 
             if not column_number:
                 self.logger.info("❓ 打开命令未指定列号，询问用户")
@@ -1918,83 +2178,26 @@ class CommandHandler:
                 response = "请问您要打开哪一列柜子？例如：第三列、3列"
                 return response
 
-            # 有列号时执行打开控制
-            success = self.send_websocket_message('open_cabinet', {
-                'colNo': column_number  # 使用'colNo'参数与app.py一致
-            }, original_text)
-
-            # 修复：添加响应返回
-            if success:
-                response = f"好的，正在为您打开第{column_number}列柜子"
-                return response
-            else:
-                error_msg = "打开命令发送失败，请稍后重试"
-                return error_msg
+            # 有列号时执行打开控制（使用'colNo'参数与app.py一致）
+            return self._dispatch('open_cabinet', {'colNo': column_number}, original_text,
+                                  f"好的，正在为您打开第{column_number}列柜子", "打开命令发送失败，请稍后重试")
 
         except Exception as e:
-            self.logger.error(f"❌ 档案柜控制失败: {e}")
+            self.logger.error("❌ 档案柜控制失败: %s", e)
             error_msg = "处理柜子控制时出现错误"
             return error_msg
 
     def _extract_temperature(self, text):
         """提取温度值 - 支持中文数字和阿拉伯数字"""
-        try:
-            # 中文数字到阿拉伯数字的映射
-            chinese_number_map = {
-                '零': '0', '一': '1', '二': '2', '两': '2', '三': '3', '四': '4', '五': '5',
-                '六': '6', '七': '7', '八': '8', '九': '9', '十': '10',
-                '十一': '11', '十二': '12', '十三': '13', '十四': '14', '十五': '15',
-                '十六': '16', '十七': '17', '十八': '18', '十九': '19', '二十': '20',
-                '二十一': '21', '二十二': '22', '二十三': '23', '二十四': '24', '二十五': '25',
-                '二十六': '26', '二十七': '27', '二十八': '28', '二十九': '29', '三十': '30'
-            }
-
-            # 匹配模式：支持中文数字和阿拉伯数字
-            patterns = [
-                r'(\d+)度',           # 25度
-                r'(\d+)摄氏度',        # 25摄氏度
-                r'(\d+)°',            # 25°
-                r'([零一二两三四五六七八九十]+)度',      # 二十五度
-                r'([零一二两三四五六七八九十]+)摄氏度',   # 二十五摄氏度
-                r'([零一二两三四五六七八九十]+)°'        # 二十五°
-            ]
-
-            for pattern in patterns:
-                match = re.search(pattern, text)
-                if match:
-                    number_str = match.group(1)
-
-                    # 如果是中文数字，转换为阿拉伯数字
-                    if number_str in chinese_number_map:
-                        temperature = chinese_number_map[number_str]
-                        self.logger.info(f"✅ 中文数字转换: {number_str} -> {temperature}")
-                        return temperature
-                    elif number_str.isdigit():
-                        self.logger.info(f"✅ 提取到温度: {number_str}")
-                        return number_str
-
-            # 如果没有匹配到模式，尝试直接提取数字
-            digit_match = re.search(r'[零一二两三四五六七八九十\d]+', text)
-            if digit_match:
-                number_str = digit_match.group()
-                if number_str in chinese_number_map:
-                    temperature = chinese_number_map[number_str]
-                    self.logger.info(f"✅ 宽松模式中文数字转换: {number_str} -> {temperature}")
-                    return temperature
-                elif number_str.isdigit():
-                    self.logger.info(f"✅ 宽松模式提取到温度: {number_str}")
-                    return number_str
-
-            return None
-
-        except Exception as e:
-            self.logger.error(f"提取温度失败: {e}")
-            return None
+        temperature, log_message, log_args = _parse_temperature(text)
+        if log_message:
+            self.logger.info(log_message, *log_args)
+        return temperature
 
     def _handle_column_input(self, text, original_text):
         """处理列号输入 - 严格按照app.py格式"""
         try:
-            self.logger.info(f"🔍 处理列号输入，原始文本: {text}")
+            self.logger.info("🔍 处理列号输入，原始文本: %s", text)
 
             # 获取待处理的动作
             action = self.conversation_state.get('pending_action', 'open')  # 默认打开
@@ -2008,18 +2211,12 @@ class CommandHandler:
                     'pending_context': None
                 })
                 # 关闭所有柜子 - 严格按照app.py格式
-                success = self.send_websocket_message('close_cabinet', {
-                    'action': 'off'
-                }, original_text)
-                if success:
-                    response = "好的，正在为您关闭所有档案柜"
-                    return response
-                else:
-                    return "关闭命令发送失败"
+                return self._dispatch('close_cabinet', {'action': 'off'}, original_text,
+                                      "好的，正在为您关闭所有档案柜", "关闭命令发送失败")
 
             # 打开命令需要列号
             column_number = self._extract_column_number(text)
-            self.logger.info(f"🔍 提取到的列号: {column_number}")
+            self.logger.info("🔍 提取到的列号: %s", column_number)
 
             if column_number:
                 # 重置状态
@@ -2034,12 +2231,12 @@ class CommandHandler:
                 }, original_text)
             else:
                 # 如果没有提取到列号，继续询问（不重置状态）
-                self.logger.warning(f"❌ 未提取到列号，文本: {text}")
+                self.logger.warning("❌ 未提取到列号，文本: %s", text)
                 response = "抱歉，我没有听清楚列号。请告诉我您要打开哪一列柜子？例如：第三列、3列"
                 return response
 
         except Exception as e:
-            self.logger.error(f"❌ 列号输入处理失败: {e}")
+            self.logger.error("❌ 列号输入处理失败: %s", e)
             # 异常时才重置状态
             self.conversation_state.update({
                 'waiting_for_column': False,
@@ -2048,124 +2245,28 @@ class CommandHandler:
             })
             return "处理柜子控制时出现错误"
 
-    def _extract_column_number(self, text):
-        """提取列号信息 - 智能语义理解版"""
-        try:
-            # 首先处理常见的错别字和同音字
-            text = text.replace("相子", "柜子").replace("箱子", "柜子").replace("贵子", "柜子")
-            text = text.replace("类", "列").replace("号", "列").replace("个", "列")  # 增强容错
-
-            # 中文数字到阿拉伯数字的映射 - 扩展版本
-            chinese_to_digit = {
-                '零': '0', '一': '1', '二': '2', '两': '2', '三': '3', '四': '4',
-                '五': '5', '六': '6', '七': '7', '八': '8', '九': '9', '十': '10',
-                '十一': '11', '十二': '12', '十三': '13', '十四': '14', '十五': '15',
-                '十六': '16', '十七': '17', '十八': '18', '十九': '19', '二十': '20',
-                '二十一': '21', '二十二': '22', '二十三': '23', '二十四': '24', '二十五': '25',
-                '二十六': '26', '二十七': '27', '二十八': '28', '二十九': '29', '三十': '30'
-            }
-
-            # 增强匹配模式：支持多种表达方式
-            patterns = [
-                # 标准模式
-                r'第([一二两三四五六七八九十]+)[列柜]',
-                r'([一二两三四五六七八九十]+)[列柜]',
-                r'第(\d+)[列柜]',
-                r'(\d+)[列柜]',
-                # 容错模式
-                r'第([一二两三四五六七八九十]+)类',
-                r'([一二两三四五六七八九十]+)类',
-                r'第([一二两三四五六七八九十]+)号',
-                r'([一二两三四五六七八九十]+)号',
-                r'第([一二两三四五六七八九十]+)个',
-                r'([一二两三四五六七八九十]+)个',
-                # 动作+数字模式
-                r'打开([一二两三四五六七八九十]+)',
-                r'打开(\d+)',
-                r'开([一二两三四五六七八九十]+)',
-                r'开(\d+)',
-                r'关闭([一二两三四五六七八九十]+)',
-                r'关闭(\d+)',
-                r'关([一二两三四五六七八九十]+)',
-                r'关(\d+)',
-                # 纯数字模式
-                r'第([一二两三四五六七八九十]+)',
-                r'第(\d+)',
-            ]
-
-            column_found = None
-            for pattern in patterns:
-                col_match = re.search(pattern, text)
-                if col_match:
-                    number_str = col_match.group(1)
-                    # 如果是中文数字，转换为阿拉伯数字
-                    if number_str in chinese_to_digit:
-                        column_found = chinese_to_digit[number_str]
-                    elif number_str.isdigit():
-                        column_found = number_str
-
-                    if column_found:
-                        self.logger.info(f"✅ 提取到列号: {column_found}，匹配模式: {pattern}")
-                        break
-
-            # 如果没找到，尝试更宽松的匹配
-            if not column_found:
-                # 直接匹配数字
-                digit_match = re.search(r'[一二两三四五六七八九十\d]+', text)
-                if digit_match:
-                    number_str = digit_match.group()
-                    if number_str in chinese_to_digit:
-                        column_found = chinese_to_digit[number_str]
-                    elif number_str.isdigit():
-                        column_found = number_str
-                    if column_found:
-                        self.logger.info(f"✅ 宽松模式提取到列号: {column_found}")
-
-            # 调试信息：记录提取过程
-            self.logger.info(f"🔍 列号提取过程: 原始文本='{text}', 提取结果='{column_found}'")
-
-            return column_found
-
-        except Exception as e:
-            self.logger.error(f"提取列号失败: {e}")
-            return None
-
     def _handle_selection(self, text, original_text):
         """处理用户选择 - 增强版本：支持更多表达方式"""
         try:
             # 记录详细的调试信息
-            self.logger.info(f"🎯 开始处理选择命令: '{text}' (原始: '{original_text}')")
+            self.logger.info("🎯 开始处理选择命令: '%s' (原始: '%s')", text, original_text)
 
             # 提取选择序号
             selection_index = self._extract_selection_index(text)
 
-            self.logger.info(f"🔢 提取到的选择序号: {selection_index}")
+            self.logger.info("🔢 提取到的选择序号: %s", selection_index)
 
             if selection_index is None:
                 # 🔥 关键修复：如果无法提取选择序号，重置选择状态
                 self.conversation_state['expecting_selection'] = False
                 self.logger.warning("❌ 无法提取选择序号，已重置选择状态")
 
-                # 尝试更宽松的匹配
-                if '二' in text or '两' in text:
-                    selection_index = 2
-                elif '三' in text:
-                    selection_index = 3
-                elif '四' in text:
-                    selection_index = 4
-                elif '五' in text:
-                    selection_index = 5
-                elif '六' in text:
-                    selection_index = 6
-                elif '七' in text:
-                    selection_index = 7
-                elif '八' in text:
-                    selection_index = 8
-                elif '九' in text:
-                    selection_index = 9
-                elif '十' in text:
-                    selection_index = 10
-                elif '第一条' in text or '第一个' in text or '首选' in text:
+                # 尝试更宽松的匹配：一次扫描，出现多个数字时取最小的（与原先 二→十 的判断顺序一致）
+                selection_index = min(
+                    (_CN_SELECTION_FALLBACK[char] for char in text if char in _CN_SELECTION_FALLBACK),
+                    default=None
+                )
+                if selection_index is None and ('第一条' in text or '第一个' in text or '首选' in text):
                     selection_index = 1
 
             if selection_index is None:
@@ -2175,7 +2276,7 @@ class CommandHandler:
                 return "请告诉我您要选择第几条？例如：第一条、第二个，或者直接说数字"
 
             # 发送选择消息给前端 - 严格按照app.py格式
-            self.logger.info(f"📤 发送选择消息到前端: index={selection_index-1}")
+            self.logger.info("📤 发送选择消息到前端: index=%s", selection_index - 1)
 
             success = self.send_websocket_message('select_record', {
                 'index': selection_index - 1  # 转为0基索引
@@ -2188,69 +2289,21 @@ class CommandHandler:
 
                 # 友好的响应
                 response = f"好的，已选择第{selection_index}条记录"
-                self.logger.info(f"✅ 选择处理成功: {response}")
+                self.logger.info("✅ 选择处理成功: %s", response)
                 return response
             else:
                 error_msg = "选择命令发送失败，请稍后重试"
-                self.logger.error(f"❌ {error_msg}")
+                self.logger.error("❌ %s", error_msg)
                 return error_msg
 
         except Exception as e:
-            self.logger.error(f"❌ 选择处理失败: {e}", exc_info=True)
+            self.logger.error("❌ 选择处理失败: %s", e, exc_info=True)
             error_msg = "处理选择时出现错误"
             return error_msg
 
     def _extract_selection_index(self, text):
         """提取选择序号"""
-        try:
-            # 中文数字映射
-            chinese_numbers = {
-                '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
-                '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
-                '第一': 1, '第二': 2, '第三': 3, '第四': 4, '第五': 5,
-                '第六': 6, '第七': 7, '第八': 8, '第九': 9, '第十': 10,
-                '十一': 11, '十二': 12, '十三': 13, '十四': 14, '十五': 15,
-                '十六': 16, '十七': 17, '十八': 18, '十九': 19, '二十': 20
-            }
-            # 匹配模式
-            patterns = [
-                r'第([一二三四五六七八九十]+)条',
-                r'第([一二三四五六七八九十]+)个',
-                r'([一二三四五六七八九十]+)条',
-                r'([一二三四五六七八九十]+)个',
-                r'选择第([一二三四五六七八九十]+)条',
-                r'选择第([一二三四五六七八九十]+)个',
-                r'第(\d+)条',
-                r'第(\d+)个',
-                r'选择第(\d+)条',
-                r'选择第(\d+)个',
-                r'(\d+)条',
-                r'(\d+)个'
-            ]
-            for pattern in patterns:
-                match = re.search(pattern, text)
-                if match:
-                    number_str = match.group(1)
-                    # 中文数字转换
-                    if number_str in chinese_numbers:
-                        return chinese_numbers[number_str]
-                    elif number_str.isdigit():
-                        return int(number_str)
-            # 简单匹配
-            if '第一条' in text or '第一个' in text or '首选' in text or '第一个' in text:
-                return 1
-            elif '第二条' in text or '第二个' in text:
-                return 2
-            elif '第三条' in text or '第三个' in text:
-                return 3
-            elif '第四条' in text or '第四个' in text:
-                return 4
-            elif '第五条' in text or '第五个' in text:
-                return 5
-            return None
-        except Exception as e:
-            print(f"❌ 提取选择序号失败: {e}")
-            return None
+        return _parse_selection_index(text)
 
 
     def reset_conversation_state(self):
@@ -2269,136 +2322,53 @@ class CommandHandler:
         }
 
 
+    @property
+    def jieba(self):
+        """jieba分词器 - 首次访问时才导入并添加自定义词汇"""
+        if self._jieba is None:
+            import jieba
+            self._jieba = jieba
+            self._init_jieba()
+            self.logger.info("✅ jieba分词器初始化成功")
+        return self._jieba
+
     def _init_jieba(self):
         """初始化jieba分词，添加自定义词汇"""
-        # 添加常见人名到词典
-        common_names = ['张三', '李四', '王五', '赵六', '钱七', '孙八', '周九', '吴十']
-        for name in common_names:
-            jieba.add_word(name, freq=1000, tag='nr')
-            # 添加除鼠器控制词汇 - 更新（包括同音字）
-        rodent_repeller_words = [
-            '除鼠器', '驱鼠器', '老鼠', '驱鼠', '低频', '高频', '总开关关闭',
-            '关闭除鼠器', '除鼠器关闭', '除鼠器低频', '除鼠器高频',
-            # 同音字词汇 - 大幅扩展
-            '出除数', '出鼠器', '储鼠器', '出鼠', '除鼠设备', '驱鼠设备',
-            '鼠器', '鼠设备', '老鼠器', '大老鼠器', '小老鼠器', '耗子器',
-            '打开楚楚', '楚楚器', '楚楚',  # 新增：楚楚相关
-            '打鼠器', '灭鼠器', '防鼠器', '抗鼠器',
-            '树器', '数器', '开树器', '开数器',
-            '开老鼠', '开大老鼠', '开小老鼠', '开耗子',
-            '开鼠', '打鼠', '开树', '打树', '开数', '打数',
-            # 属的同音字系列
-            '属', '述', '束', '术', '树', '数', '署', '蜀', '薯', '暑', '书', '舒',
-            '开属', '开述', '开束', '开术', '开树', '开数', '开署', '开蜀', '开薯', '开暑', '开书',
-            '打属', '打述', '打束', '打术', '打树', '打数', '打署', '打蜀', '打薯', '打暑', '打书',
-            '除属', '除述', '除束', '除数', '除暑', '除书',
-            '驱属', '驱述', '驱束', '驱暑', '驱书'
-        ]
-        for word in rodent_repeller_words:
-            jieba.add_word(word, freq=1000, tag='n')
-        # 添加唤醒词
+        # 人名、除鼠器/空调/加湿器/档案柜控制、命令、时间、数字等固定词汇统一放在用户词典中，
+        # 一次读入代替逐个 add_word（每行：词语 词频 词性）
+        self._jieba.load_userdict(_JIEBA_USER_DICT)
+        # 添加唤醒词（来自配置）
         for wake_word in WAKE_WORDS:
-            jieba.add_word(wake_word, freq=2000, tag='n')
-        # 添加命令关键词
-        command_words = ['查询', '查找', '搜索', '显示', '列出', '查一下', '找一下']
-        for cmd in command_words:
-            jieba.add_word(cmd, freq=1500, tag='v')
-        # 添加时间相关词汇
-        time_words = ['时间', '几点', '现在', '日期', '今天', '钟点', '什么时候']
-        for time_word in time_words:
-            jieba.add_word(time_word, freq=1000, tag='n')
-        # 添加年份相关词汇
-        year_words = ['年', '年份', '年度', '哪年', '什么时候入职']
-        for year_word in year_words:
-            jieba.add_word(year_word, freq=800, tag='n')
-        # 添加档案柜控制词汇
-        cabinet_words = ['打开', '关闭', '开启', '启动', '停止', '档案柜', '柜子', '列']
-        for cabinet_word in cabinet_words:
-            jieba.add_word(cabinet_word, freq=1000, tag='v')
-        # 添加基础对话词汇
-        basic_conversation = ['你叫什么', '你是谁', '你几岁', '你多大', '介绍自己', '自我介绍']
-        for word in basic_conversation:
-            jieba.add_word(word, freq=1000, tag='n')
-        # 添加中文数字词汇
-        chinese_numbers = ['一', '二', '两', '三', '四', '五', '六', '七', '八', '九', '十',
-                           '十一', '十二', '十三', '十四', '十五', '十六', '十七', '十八', '十九', '二十']
-        for num in chinese_numbers:
-            jieba.add_word(num, freq=800, tag='m')
-
-        temperature_words = ['度', '摄氏度', '温度', '升温', '降温', '调高', '调低']
-        for word in temperature_words:
-            jieba.add_word(word, freq=800, tag='n')
-
-        # 添加中文数字
-        chinese_numbers_extended = [
-            '零', '一', '二', '两', '三', '四', '五', '六', '七', '八', '九', '十',
-            '十一', '十二', '十三', '十四', '十五', '十六', '十七', '十八', '十九', '二十',
-            '二十一', '二十二', '二十三', '二十四', '二十五', '二十六', '二十七', '二十八', '二十九', '三十'
-        ]
-        for num in chinese_numbers_extended:
-            jieba.add_word(num, freq=800, tag='m')
-
-        # 添加空调控制词汇
-        air_conditioner_words = [
-            '空调', '制冷', '制热', '除湿', '开机', '关机',
-            '制冷18度', '制冷20度', '制冷22度',
-            '制热20度', '制热22度', '制热24度',
-            '除湿25度'
-        ]
-        for word in air_conditioner_words:
-            jieba.add_word(word, freq=1000, tag='n')
-
-        # 添加加湿器控制词汇 - 扩展
-        dehumidifier_words = [
-            '加湿器', '除湿', '净化', '加湿',
-            '打开加湿器', '关闭加湿器', '加湿器开机', '加湿器关机',
-            '一体机', '温湿度一体机', '湿度一体机', '温度一体机',
-            '打开一体机', '关闭一体机', '打开温湿度一体机', '关闭温湿度一体机'
-        ]
-        for word in dehumidifier_words:
-            jieba.add_word(word, freq=1000, tag='n')
+            self._jieba.add_word(wake_word, freq=2000, tag='n')
 
     def _is_pure_wakeup_call(self, text):
         """判断是否为纯唤醒呼叫 - 正则表达式简化版"""
         if not text:
             return False
 
-        # 定义打招呼词语和"小电"的同音字
-        greeting_words = ['你好', '您好', '嗨', '嘿', '喂', '哈喽', 'hello', 'hi']
-        xiaozhi_variants = ['小电', '小知', '小之', '小志', '小只', '小指', '小枝', '小纸', '小直', '小稚']
-
-        # 构建正则表达式模式
-        # 匹配：打招呼词 + 0或多个任意字符 + "小电"同音字
-        # 或者："小电"同音字 + 0或多个任意字符 + 打招呼词
-        greeting_pattern = '|'.join(greeting_words)
-        xiaozhi_pattern = '|'.join(xiaozhi_variants)
-
-        # 构建完整的正则表达式
-        pattern = f'({greeting_pattern}).*?({xiaozhi_pattern})|({xiaozhi_pattern}).*?({greeting_pattern})'
+        if _WAKE_CHARSET.isdisjoint(text):
+            self.logger.info("❌ 不是纯唤醒词: '%s'", text)
+            return False
 
-        # 使用正则表达式匹配（使用参数text而不是未定义的cleaned_text）
-        match = re.search(pattern, text, re.IGNORECASE)
+        match = _WAKE_PATTERN.search(text)
 
         if match:
-            self.logger.info(f"🎯 正则匹配到纯唤醒词: '{text}' -> 匹配组: {match.groups()}")
+            self.logger.info("🎯 正则匹配到纯唤醒词: '%s' -> 匹配组: %s", text, match.groups())
             return True
 
         # 保留原有的短文本检查作为备用
         if len(text) <= 4:
-            wake_indicators = xiaozhi_variants + greeting_words
-            for indicator in wake_indicators:
+            for indicator in _XIAOZHI_VARIANTS + _GREETING_WORDS:
                 if indicator in text:
-                    self.logger.info(f"🎯 短文本检测到唤醒词特征: '{indicator}' 在 '{text}' 中")
+                    self.logger.info("🎯 短文本检测到唤醒词特征: '%s' 在 '%s' 中", indicator, text)
                     return True
 
-        self.logger.info(f"❌ 不是纯唤醒词: '{text}'")
+        self.logger.info("❌ 不是纯唤醒词: '%s'", text)
         return False
 
 
     def _get_greeting_response(self):
         """小爱风格问候回复 - 增强版本"""
-        import random
-
         # 获取当前时间
         current_hour = datetime.now().hour
 
@@ -2415,17 +2385,7 @@ class CommandHandler:
             time_greeting = "你好"
 
         # 小爱同学风格回复
-        greetings = [
-            f"哎~ {time_greeting}呀~ 我是小电，很高兴为你服务哦~ 请问需要查询档案信息，还是控制档案柜呢？",
-            f"哎~ {time_greeting}~ 小电来啦~ 可以帮你查询档案或控制柜子，尽管问哦~",
-            f"哎~ {time_greeting}呀~ 小电随时为你待命，有什么可以帮忙的吗？",
-            f"在呢~ {time_greeting}~ 我是你的智能助手小电，请问有什么需要？",
-            f"哎~ {time_greeting}~ 小电在这里，需要查询档案还是控制设备呢？",
-            f"来啦~ {time_greeting}呀~ 我是小电，档案查询、柜子控制都可以找我哦~",
-            f"嗯~ {time_greeting}~ 小电已就位，请下达指令吧~"
-        ]
-
-        return random.choice(greetings)
+        return random.choice(_GREETING_TEMPLATES).format(time_greeting=time_greeting)
 
     def _handle_with_ollama_directly(self, text):
         """直接使用Ollama处理命令 - 直接使用AI回复"""
@@ -2442,14 +2402,14 @@ class CommandHandler:
                 self.send_websocket_message('ai_response', {'response': response}, text)
                 return response
 
-            self.logger.info(f"🚀 直接调用AI处理: {text}")
+            self.logger.info("🚀 直接调用AI处理: %s", text)
 
             # 直接调用AI，不进行语义纠正
             ollama_response = self.ollama_client.send_message(text)
 
             # 直接使用AI的回复
             if ollama_response:
-                self.logger.info(f"✅ AI处理成功: {ollama_response}")
+                self.logger.info("✅ AI处理成功: %s", ollama_response)
                 # 更新对话历史
                 if hasattr(self, 'conversation_history'):
                     self.conversation_history.append({"role": "user", "content": text})
@@ -2466,7 +2426,7 @@ class CommandHandler:
                 self.send_websocket_message('ai_response', {'response': response}, text)
                 return response
         except Exception as e:
-            self.logger.error(f"❌ AI处理异常: {e}")
+            self.logger.error("❌ AI处理异常: %s", e)
             response = "处理请求时出现错误"
             # 发送WebSocket消息
             self.send_websocket_message('ai_response', {'response': response}, text)
@@ -2474,91 +2434,38 @@ class CommandHandler:
 
     def _extract_column_number(self, text):
         """提取列号信息 - 增强版：支持错别字和口语化表达"""
-        try:
-            # 首先处理常见的错别字和同音字
-            text = text.replace("相子", "柜子").replace("箱子", "柜子").replace("贵子", "柜子")
-
-            # 中文数字到阿拉伯数字的映射
-            chinese_to_digit = {
-                '一': '1', '二': '2', '两': '2', '三': '3', '四': '4',
-                '五': '5', '六': '6', '七': '7', '八': '8', '九': '9', '十': '10',
-                '十一': '11', '十二': '12', '十三': '13', '十四': '14', '十五': '15',
-                '十六': '16', '十七': '17', '十八': '18', '十九': '19', '二十': '20'
-            }
-
-            # 增强匹配模式：支持错别字和更灵活的表达
-            patterns = [
-                r'第([一二两三四五六七八九十]+)[列柜箱相贵]',      # 第二列/第二柜/第二箱（容错）
-                r'([一二两三四五六七八九十]+)[列柜箱相贵]',        # 三列/三柜（容错）
-                r'第(\d+)[列柜箱相贵]',                          # 第2列/第2柜（容错）
-                r'(\d+)[列柜箱相贵]',                            # 3列/3柜（容错）
-                r'第([一二两三四五六七八九十]+)号',               # 第二号
-                r'([一二两三四五六七八九十]+)号',                 # 三号
-                r'第(\d+)号',                                   # 第2号
-                r'(\d+)号',                                     # 3号
-                r'打开([一二两三四五六七八九十]+)',               # 打开二
-                r'打开(\d+)',                                   # 打开2
-                r'开([一二两三四五六七八九十]+)',                 # 开二
-                r'开(\d+)',                                     # 开2
-                r'第([一二两三四五六七八九十]+)',                 # 第三（只有数字）
-                r'第(\d+)',                                     # 第3（只有数字）
-            ]
-
-            column_found = None
-            for pattern in patterns:
-                col_match = re.search(pattern, text)
-                if col_match:
-                    number_str = col_match.group(1)
-                    # 如果是中文数字，转换为阿拉伯数字
-                    if number_str in chinese_to_digit:
-                        column_found = chinese_to_digit[number_str]
-                    elif number_str.isdigit():
-                        column_found = number_str
-
-                    if column_found:
-                        self.logger.info(f"✅ 提取到列号: {column_found}，匹配模式: {pattern}")
-                        break
-
-            # 如果没找到，尝试更宽松的匹配
-            if not column_found:
-                # 直接匹配数字
-                digit_match = re.search(r'[一二两三四五六七八九十\d]+', text)
-                if digit_match:
-                    number_str = digit_match.group()
-                    if number_str in chinese_to_digit:
-                        column_found = chinese_to_digit[number_str]
-                    elif number_str.isdigit():
-                        column_found = number_str
-                    if column_found:
-                        self.logger.info(f"✅ 宽松模式提取到列号: {column_found}")
-
-            return column_found
-
-        except Exception as e:
-            self.logger.error(f"提取列号失败: {e}")
-            return None
+        column_found, log_message, log_args = _parse_column_number(text)
+        if log_message:
+            self.logger.info(log_message, *log_args)
+        return column_found
 
 
     def cleanup(self):
         """安全清理资源"""
         self.is_cleaning_up = True
         self.reset_conversation_state()
-        # 等待所有活动线程完成
-        for thread in self.active_threads:
+        # 等待所有活动线程完成（所有线程共用2秒总等待时间，而不是每个线程各等2秒）
+        deadline = time.monotonic() + _CLEANUP_JOIN_TIMEOUT
+        for thread in list(self.active_threads):
             try:
                 if thread.is_alive():
-                    thread.join(timeout=2.0)  # 最多等待2秒
+                    thread.join(timeout=max(0.0, deadline - time.monotonic()))
             except Exception as e:
-                self.logger.error(f"等待线程结束失败: {e}")
+                self.logger.error("等待线程结束失败: %s", e)
         # 清理资源
         try:
             if hasattr(self, 'db_query'):
                 self.db_query.close()
         except Exception as e:
-            self.logger.error(f"关闭数据库查询失败: {e}")
+            self.logger.error("关闭数据库查询失败: %s", e)
         try:
             if hasattr(self, 'archive_manager'):
                 self.archive_manager.close()
         except Exception as e:
-            self.logger.error(f"关闭档案管理器失败: {e}")
+            self.logger.error("关闭档案管理器失败: %s", e)
+        try:
+            if getattr(self, 'ollama_client', None):
+                self.ollama_client.close()
+        except Exception as e:
+            self.logger.error("关闭Ollama客户端失败: %s", e)
         self.logger.info("命令处理器资源已清理")
\ No newline at end of file
@@ -1,14 +1,123 @@
 # core/ollama_client.py
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
 import websockets
 import asyncio
 import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import httpx
 import ollama
 import re
+from collections import deque
+from itertools import islice
 from utils.logger import setup_logger
 
+# 可选依赖：安装了orjson时用其编解码WebSocket消息，否则回退到标准库json
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# 匹配<think>标签及其内容
+_THINK_PATTERN = re.compile(r'<think>.*?</think>', re.DOTALL)
+# 过滤思考内容后为空时的默认回复
+_EMPTY_REPLY = "我还在学习中，暂时无法回答这个问题。您可以尝试询问档案查询、档案柜控制或其他相关问题。"
+# 生成参数（ollama库只读取、不修改，可在请求间共享）
+_CHAT_OPTIONS = {"temperature": 0.9, "top_p": 0.95, "top_k": 50}     # 聊天模式
+_CONTROL_OPTIONS = {"temperature": 0.8, "top_p": 0.9, "top_k": 40}   # 设备控制模式
+# chat调用失败时视为Ollama服务不可用的异常：流式请求下ollama库不会把httpx的连接异常
+# 转换为内置ConnectionError，需要直接捕获httpx.TransportError；ResponseError为服务端返回的错误
+_OLLAMA_UNAVAILABLE_ERRORS = (ConnectionError, httpx.TransportError, ollama.ResponseError)
+# 流式响应的空闲超时（秒）：超过该时间未收到新分块即视为模型卡住；需覆盖模型冷启动加载时间
+_STREAM_IDLE_TIMEOUT = 30
+# 模型列表接口（同时用于服务可用性检测）
+_TAGS_PATH = "/api/tags"
+# 模型列表的缓存时间（秒）
+_MODELS_CACHE_TTL = 60.0
+# 服务可用性检测结果的缓存时间（秒）
+_PROBE_TTL = 15.0
+# 异步请求队列的容量，队列满时调用方等待
+_ASYNC_QUEUE_SIZE = 8
+# 对话历史保留的消息条数（4轮对话）
+_HISTORY_MAX_MESSAGES = 8
+# 流式输出时的句子结束标点
+_SENTENCE_END_MARKS = ('。', '！', '？', '!', '?', '；', '\n')
+
+# 系统提示词（聊天模式与设备控制模式共用）
+_SYSTEM_PROMPT = """
+【档案室介绍】
+该项目是国网辽宁鞍山供电公司 2025 年计量资产精益化运营项目，旨在破解传统档案管理空间饱和、效率低下难题，
+现有 5400 余盒档案存储已达上限的 90%。项目拟用 60㎡现有场地，购置 13 列 52 组双面智能移动档案密集柜
+4（总存储量 9800 盒，较原提升 63.33%），打造AI 智能大屏中枢：实时可视化呈现库房温湿度、设备状态及档案动态，
+配套智慧管理控制室总台、RFID 辅助设备等 5 类设施，集成 NLP 语义识别、OCR 识别等技术，实现档案一键智能识别、全文检索、可视化定位。
+将全面提升计量中心档案管理的数字化水平和智能化水平，为用户提供更加便捷、高效、安全的档案管理服务。     
+【角色设定】
+您好！我是国家电网档案柜助手 “小电”，专注于档案室相关服务，核心功能包括档案查询与设备控制，现将服务范围明确如下：
+一、核心服务内容
+档案查询：支持按档案编号、名称、归档日期等条件检索档案室存量档案，提供精准查询结果与调取指引；
+设备控制：可操作档案室专用设备，包括空调（温度调节）、密集架（开启 / 关闭 / 定位）、除鼠器（启动 / 状态查询）、恒湿温度一体机（温湿度参数调整与监控）。
+二、操作说明
+请您明确告知具体需求，例如 “查询东鹏的档案”“将档案室空调温度调整至 24℃”“启动 3 号密集架并定位至第 5 列”，我将按规范流程执行操作并反馈结果。
+所有操作均遵循档案室安全管理规范，如需调整关键设备参数（如温湿度阈值），将同步记录操作日志，确保档案存储环境安全可控。请提出您的具体需求，我将及时响应。
+要求：
+1、输出回答的时候不要有😊表情符号以及#和**和换行符号以及特殊符号"""
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM_PROMPT}
+
+def _partial_prefix_length(text, tag):
+    """text末尾与tag开头重合的最大长度（小于tag长度），用于保留跨分块的半个标签"""
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+
+class _ThinkStripper:
+    """流式去除<think>...</think>内容的状态机，标签可跨分块出现"""
+    __slots__ = ('buf', 'in_think')
+
+    def __init__(self):
+        self.buf = ''
+        self.in_think = False
+
+    def feed(self, text):
+        """输入一个分块，返回其中可以确定的思考内容之外的文本"""
+        buf = self.buf + text
+        out = []
+        while True:
+            if self.in_think:
+                end = buf.find('</think>')
+                if end == -1:
+                    self.buf = buf[len(buf) - _partial_prefix_length(buf, '</think>'):]
+                    break
+                buf = buf[end + len('</think>'):]
+                self.in_think = False
+            else:
+                start = buf.find('<think>')
+                if start == -1:
+                    keep = _partial_prefix_length(buf, '<think>')
+                    out.append(buf[:len(buf) - keep])
+                    self.buf = buf[len(buf) - keep:]
+                    break
+                out.append(buf[:start])
+                buf = buf[start + len('<think>'):]
+                self.in_think = True
+        return ''.join(out)
+
+    def flush(self):
+        """流结束时返回缓冲的剩余文本；未闭合的思考内容直接丢弃"""
+        rest = '' if self.in_think else self.buf
+        self.buf = ''
+        return rest
+
+
 class OllamaClient:
     def __init__(self):
         self.logger = setup_logger("ollama_client")
@@ -20,20 +129,48 @@ class OllamaClient:
 
         # 初始化ollama客户端
         try:
-            self.client = ollama.Client(host=self.base_url)
-            self.logger.info(f"✅ Ollama客户端初始化成功: {self.base_url}")
+            # timeout 作用于每次读取，即流式响应中两个分块之间的最长等待时间
+            self.client = ollama.Client(host=self.base_url, timeout=_STREAM_IDLE_TIMEOUT)
+            # 异步客户端：供 asend_message 在调用方的事件循环中使用
+            self.async_client = ollama.AsyncClient(host=self.base_url, timeout=_STREAM_IDLE_TIMEOUT)
+            self.logger.info("✅ Ollama客户端初始化成功: %s", self.base_url)
         except Exception as e:
-            self.logger.error(f"❌ Ollama客户端初始化失败: {e}")
+            self.logger.error("❌ Ollama客户端初始化失败: %s", e)
             self.client = None
+            self.async_client = None
+
+        # 复用HTTP连接（健康检查、模型列表），避免每次请求重新建立TCP连接
+        self._http = requests.Session()
+        # 针对Ollama地址单独挂载连接池：不自动重试（由调用方回退处理），连接数覆盖同时进行的检测请求
+        retry = Retry(total=0, connect=0, read=0, redirect=0, backoff_factor=0)
+        self._http.mount(self.base_url, HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retry))
+
+        # 常驻线程池执行阻塞的chat调用，避免每次请求新建线程
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ollama")
+
+        # WebSocket回退通道：常驻事件循环与复用的连接（首次使用时创建）
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._websocket = None
+        self._websocket_lock = None
+
+        # 异步接口的请求队列（绑定到首次调用 asend_message 的事件循环）
+        self._request_queue = None
+        self._request_loop = None
+        self._request_task = None
 
         # 连接状态
         self.http_available = False
         self.websocket_available = False
         self.preferred_method = "http"  # 优先使用HTTP，更可靠
+        self._probe_ok = False  # 最近一次服务检测是否成功
+        self._probe_time = 0.0  # 最近一次检测成功的时间（time.monotonic）
+        self._models_cache = None  # 最近一次获取的模型列表
+        self._models_time = 0.0
 
         # 会话管理
         self.session_id = "xiao_zhi_user_001"
-        self.conversation_history = []
+        self.conversation_history = deque(maxlen=_HISTORY_MAX_MESSAGES)  # 超出长度时自动丢弃最早的消息
 
 
     def _get_connection_error_details(self):
@@ -51,45 +188,55 @@ class OllamaClient:
         else:
             return "未知连接错误"
 
+    def _ensure_event_loop(self):
+        """获取常驻的WebSocket事件循环，首次使用时在后台线程中启动"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="ollama-websocket", daemon=True).start()
+            return self._loop
+
     def _send_via_websocket(self, message):
         """通过WebSocket发送消息 - 只尝试一次"""
         try:
-            result = [None]
-            exception = [None]
-
-            def run_websocket():
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    result[0] = loop.run_until_complete(self._websocket_send(message))
-                    loop.close()
-                except Exception as e:
-                    exception[0] = e
-
-            thread = threading.Thread(target=run_websocket, daemon=True)
-            thread.start()
-            thread.join(timeout=30)  # 30秒超时
-
-            if thread.is_alive():
+            future = asyncio.run_coroutine_threadsafe(self._websocket_send(message), self._ensure_event_loop())
+            try:
+                return future.result(timeout=30)  # 30秒超时
+            except FutureTimeoutError:
+                future.cancel()
                 self.logger.warning("⏰ WebSocket请求超时")
                 return None
 
-            if exception[0]:
-                self.logger.error(f"❌ WebSocket错误: {exception[0]}")
-                return None
-
-            return result[0]
-
         except Exception as e:
-            self.logger.error(f"❌ WebSocket发送失败: {e}")
+            self.logger.error("❌ WebSocket发送失败: %s", e)
             return None
 
+    async def _ensure_websocket(self):
+        """获取复用的WebSocket连接，未连接或已断开时重新建立"""
+        if self._websocket is None or self._websocket.closed:
+            self.logger.info("🔗 连接到WebSocket: %s", self.websocket_url)
+            self._websocket = await websockets.connect(self.websocket_url, ping_timeout=30)
+        return self._websocket
+
+    async def _close_websocket(self):
+        """关闭复用的WebSocket连接"""
+        websocket, self._websocket = self._websocket, None
+        if websocket is not None:
+            try:
+                await websocket.close()
+            except Exception as e:
+                self.logger.warning("⚠️ 关闭WebSocket连接失败: %s", e)
+
     async def _websocket_send(self, message):
         """实际的WebSocket发送逻辑"""
-        try:
-            self.logger.info(f"🔗 连接到WebSocket: {self.websocket_url}")
+        # 同一连接上一次只处理一个请求，保证响应与请求一一对应
+        if self._websocket_lock is None:
+            self._websocket_lock = asyncio.Lock()
+
+        async with self._websocket_lock:
+            try:
+                websocket = await self._ensure_websocket()
 
-            async with websockets.connect(self.websocket_url, ping_timeout=30) as websocket:
                 # 构建消息
                 payload = {
                     "type": "query",
@@ -99,14 +246,14 @@ class OllamaClient:
                     "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
                 }
 
-                self.logger.info(f"📤 发送WebSocket消息: {message}")
-                await websocket.send(json.dumps(payload))
+                self.logger.info("📤 发送WebSocket消息: %s", message)
+                await websocket.send(_json_dumps(payload))
 
                 # 等待响应
                 response = await asyncio.wait_for(websocket.recv(), timeout=30)
-                response_data = json.loads(response)
+                response_data = _json_loads(response)
 
-                self.logger.info(f"📥 收到WebSocket响应: {response_data}")
+                self.logger.debug("📥 收到WebSocket响应: %s", response_data)
 
                 if response_data.get("success", False):
                     content = response_data.get("content", "未收到有效内容")
@@ -115,15 +262,18 @@ class OllamaClient:
                     return content
                 else:
                     error_msg = response_data.get('error', '未知错误')
-                    self.logger.error(f"❌ WebSocket响应失败: {error_msg}")
+                    self.logger.error("❌ WebSocket响应失败: %s", error_msg)
                     return None
 
-        except asyncio.TimeoutError:
-            self.logger.error("⏰ WebSocket请求超时")
-            return None
-        except Exception as e:
-            self.logger.error(f"❌ WebSocket通信错误: {e}")
-            return None
+            except asyncio.TimeoutError:
+                # 超时后连接上可能还有迟到的响应，丢弃该连接
+                await self._close_websocket()
+                self.logger.error("⏰ WebSocket请求超时")
+                return None
+            except Exception as e:
+                await self._close_websocket()
+                self.logger.error("❌ WebSocket通信错误: %s", e)
+                return None
 
 
     def _filter_think_tags(self, text):
@@ -131,17 +281,16 @@ class OllamaClient:
         if not text:
             return text
 
-        # 移除<think>和</think>标签及其内容
-        import re
-        # 匹配<think>标签及其内容
-        think_pattern = r'<think>.*?</think>'
-        filtered = re.sub(think_pattern, '', text, flags=re.DOTALL)
+        # 移除<think>和</think>标签及其内容；不含标签时跳过正则
+        if '<think>' in text:
+            text = _THINK_PATTERN.sub('', text)
+        filtered = text.strip()
 
         # 如果过滤后为空，返回默认回复
-        if not filtered.strip():
-            return "我还在学习中，暂时无法回答这个问题。您可以尝试询问档案查询、档案柜控制或其他相关问题。"
+        if not filtered:
+            return _EMPTY_REPLY
 
-        return filtered.strip()
+        return filtered
 
     def _update_conversation_history(self, user_message, assistant_message):
         """更新对话历史"""
@@ -151,51 +300,51 @@ class OllamaClient:
         # 添加助手回复
         self.conversation_history.append({"role": "assistant", "content": assistant_message})
 
-        # 限制历史记录长度，避免过长
-        if len(self.conversation_history) > 8:  # 保留4轮对话
-            self.conversation_history = self.conversation_history[-8:]
-
-        self.logger.info(f"📚 更新对话历史，当前轮数: {len(self.conversation_history)//2}")
+        self.logger.info("📚 更新对话历史，当前轮数: %s", len(self.conversation_history)//2)
 
     def is_service_available(self):
         """检查Ollama服务是否可用 - 修复版"""
+        # 最近一次检测成功且未过期时直接返回，避免每条消息都多一次HTTP往返；失败结果不缓存
+        if self._probe_ok and time.monotonic() - self._probe_time < _PROBE_TTL:
+            return True
+
+        self._probe_ok = False
         try:
-            # 直接测试连接，而不是依赖缓存的状态
-            test_url = f"{self.base_url}/api/tags"
-            response = requests.get(test_url, timeout=5)
+            # HEAD请求只确认服务在线，不传输模型列表
+            test_url = f"{self.base_url}{_TAGS_PATH}"
+            response = self._http.head(test_url, timeout=2)
 
             if response.status_code == 200:
                 self.http_available = True
+                self._probe_ok = True
+                self._probe_time = time.monotonic()
                 self.logger.info("✅ Ollama服务连接测试成功")
                 return True
             else:
-                self.logger.warning(f"⚠️ Ollama服务响应异常: {response.status_code}")
+                self.logger.warning("⚠️ Ollama服务响应异常: %s", response.status_code)
                 return False
 
         except Exception as e:
-            self.logger.error(f"❌ Ollama服务连接测试失败: {e}")
+            self.logger.error("❌ Ollama服务连接测试失败: %s", e)
             self.http_available = False
             return False
 
 
-    def send_message(self, message, chat_mode=False):
-        """发送消息 - 整合版，支持普通模式和聊天模式"""
-        self.logger.info(f"🚀 开始处理{'聊天' if chat_mode else '普通'}消息: '{message}'")
+    def send_message(self, message, chat_mode=False, on_sentence=None):
+        """发送消息 - 整合版，支持普通模式和聊天模式
 
-        # 检查服务状态
-        if not self.is_service_available():
-            error_msg = self._get_connection_error_details()
-            self.logger.error(f"❌ 服务不可用: {error_msg}")
-            return error_msg
+        on_sentence: 可选回调，HTTP流式生成过程中每得到一个完整句子（已去除思考内容）即调用一次，
+        便于语音合成边生成边播报；回调在线程池线程中执行。返回值仍为完整回复。
+        """
+        self.logger.info("🚀 开始处理%s消息: '%s'", '聊天' if chat_mode else '普通', message)
 
-        # 优先使用HTTP（更可靠）
-        if self.http_available:
-            self.logger.info(f"🌐 使用HTTP generate端点进行{'聊天' if chat_mode else '普通'}处理...")
-            result = self._send_via_http(message, chat_mode)
-            if result and result not in ["抱歉，我没有理解您的意思", "请求超时", "小电正在努力学习这个问题"]:
-                return result
-            else:
-                self.logger.warning(f"⚠️ HTTP请求失败，结果: {result}")
+        # 优先使用HTTP（更可靠）；不再预先探测服务，连接失败时chat调用会立即报错并回退
+        self.logger.info("🌐 使用HTTP generate端点进行%s处理...", '聊天' if chat_mode else '普通')
+        result = self._send_via_http(message, chat_mode, on_sentence)
+        if result and result not in ["抱歉，我没有理解您的意思", "请求超时", "小电正在努力学习这个问题"]:
+            return result
+        else:
+            self.logger.warning("⚠️ HTTP请求失败，结果: %s", result)
 
         # 回退到WebSocket
         if self.websocket_available:
@@ -204,199 +353,392 @@ class OllamaClient:
             if result and result not in ["抱歉，我没有理解您的意思", "请求超时"]:
                 return result
             else:
-                self.logger.warning(f"⚠️ WebSocket请求失败，结果: {result}")
+                self.logger.warning("⚠️ WebSocket请求失败，结果: %s", result)
 
         # 所有连接都失败，返回详细的错误信息
         error_msg = self._get_connection_error_details()
-        self.logger.error(f"❌ 所有连接方式都失败: {error_msg}")
+        self.logger.error("❌ 所有连接方式都失败: %s", error_msg)
         return f"无法连接到AI服务。{error_msg}"
 
     def send_chat_message(self, message):
         """发送聊天消息 - 调用整合后的send_message方法"""
         return self.send_message(message, chat_mode=True)
 
-    def _send_via_http(self, message, chat_mode=False):
+    def _send_via_http(self, message, chat_mode=False, on_sentence=None):
         """通过ollama库发送消息 - 整合版，支持普通模式和聊天模式"""
         if not self.client:
             return None
 
         try:
-            # 根据模式构建消息
-            if chat_mode:
-                messages = self._build_chat_messages(message)
-                options = {
-                    "temperature": 0.9,
-                    "top_p": 0.95,
-                    "top_k": 50,
-                }
-            else:
-                messages = self._build_messages_with_history(message)
-                options = {
-                    "temperature": 0.8,
-                    "top_p": 0.9,
-                    "top_k": 40,
-                }
-
-            self.logger.info(f"🔄 调用Ollama聊天接口...{'聊天模式' if chat_mode else '设备控制模式'}")
+            messages, options = self._build_request(message, chat_mode)
 
             start_time = time.time()
 
-            # 使用ollama库的chat方法 - 增加超时处理
-            result = [None]
-            exception = [None]
+            # 使用ollama库的流式chat方法 - 提交到常驻线程池，增加超时处理
+            cancelled = threading.Event()
+            future = self._executor.submit(self._stream_chat, messages, options, on_sentence, cancelled)
+            try:
+                response = future.result(timeout=100)  # 100秒超时
+            except FutureTimeoutError:
+                # 通知工作线程停止读取剩余的流
+                cancelled.set()
+                self.logger.warning("⏰ 请求超时，返回默认回复")
+                return "小电正在努力学习这个问题"
+            except _OLLAMA_UNAVAILABLE_ERRORS as e:
+                # 服务不可达：标记状态，下次检测时重新探测
+                self.http_available = False
+                self._probe_ok = False
+                self.logger.error("❌ 无法连接Ollama服务: %s", e)
+                return None
+            except Exception as e:
+                self.logger.error("❌ 调用异常: %s", e)
+                return "小电正在努力学习这个问题"
+
+            self.http_available = True
+            end_time = time.time()
+            self.logger.info("⏱️ 请求耗时: %.2f秒", end_time - start_time)
+            return self._finish_reply(message, response)
+
+        except Exception as e:
+            self.logger.error("❌ 通信错误: %s", e)
+            return "小电正在努力学习这个问题"
 
-            def call_ollama():
+    async def asend_message(self, message, chat_mode=False):
+        """异步发送消息 - 供运行在asyncio事件循环中的调用方直接await，HTTP请求不占用线程池线程
+
+        请求进入有界队列，由单个消费者依次处理：模型推理受GPU限制，并发请求交错执行并不会更快，
+        队列满时调用方在put处等待（背压）。
+        """
+        loop = asyncio.get_running_loop()
+        if self._request_queue is None or self._request_loop is not loop:
+            # 事件循环变化时停止旧循环上的消费者
+            self._cancel_request_task()
+            self._request_queue = asyncio.Queue(maxsize=_ASYNC_QUEUE_SIZE)
+            self._request_loop = loop
+            # 保存任务引用：事件循环只弱引用任务，未被引用的任务可能在运行中被回收
+            self._request_task = loop.create_task(self._process_async_requests(self._request_queue))
+
+        queue = self._request_queue
+        future = loop.create_future()
+        await queue.put((message, chat_mode, future))
+        if queue is not self._request_queue:
+            # 等待入队期间消费者已被取消，该队列不会再被处理
+            future.cancel()
+        return await future
+
+    def _cancel_request_task(self):
+        """取消异步请求队列的消费者任务，并取消所有排队中的请求（可从任意线程调用）"""
+        task, queue, loop = self._request_task, self._request_queue, self._request_loop
+
+        def shutdown():
+            # 在事件循环线程中执行：Future和Queue都不是线程安全的
+            if task is not None:
+                task.cancel()
+            if queue is not None:
+                self._cancel_queued_requests(queue)
+
+        if loop is not None and not loop.is_closed():
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            try:
+                if running_loop is loop:
+                    shutdown()
+                else:
+                    loop.call_soon_threadsafe(shutdown)
+            except RuntimeError:
+                # 事件循环已关闭，任务和请求不会再运行
+                pass
+
+        # 丢弃队列，之后的 asend_message 会重新创建队列和消费者
+        self._request_task = None
+        self._request_queue = None
+
+    @staticmethod
+    def _cancel_queued_requests(queue):
+        """取出并取消队列中尚未处理的请求，使等待结果的调用方不会一直挂起"""
+        while not queue.empty():
+            _, _, future = queue.get_nowait()
+            if not future.done():
+                future.cancel()
+            queue.task_done()
+
+    async def _process_async_requests(self, queue):
+        """依次处理排队的异步请求"""
+        future = None
+        try:
+            while True:
+                message, chat_mode, future = await queue.get()
                 try:
-                    result[0] = self.client.chat(
-                        model=self.model_name,
-                        messages=messages,
-                        options=options
-                    )
+                    if not future.cancelled():
+                        result = await self._asend_message(message, chat_mode)
+                        if not future.cancelled():
+                            future.set_result(result)
                 except Exception as e:
-                    exception[0] = e
+                    if not future.done():
+                        future.set_exception(e)
+                finally:
+                    queue.task_done()
+                future = None
+        except asyncio.CancelledError:
+            # 消费者被取消（close()或更换事件循环）：取消当前请求和所有排队的请求
+            if future is not None and not future.done():
+                future.cancel()
+            self._cancel_queued_requests(queue)
+            raise
+
+    async def _asend_message(self, message, chat_mode=False):
+        """异步发送消息的实际处理逻辑"""
+        self.logger.info("🚀 开始异步处理%s消息: '%s'", '聊天' if chat_mode else '普通', message)
+
+        result = await self._asend_via_http(message, chat_mode)
+        if result and result not in ["抱歉，我没有理解您的意思", "请求超时", "小电正在努力学习这个问题"]:
+            return result
+        else:
+            self.logger.warning("⚠️ HTTP请求失败，结果: %s", result)
 
-            thread = threading.Thread(target=call_ollama, daemon=True)
-            thread.start()
-            thread.join(timeout=100)  # 120秒超时
+        # 回退到WebSocket（连接由常驻事件循环持有，这里只等待其结果）
+        if self.websocket_available:
+            self.logger.info("🔗 尝试使用WebSocket连接...")
+            try:
+                future = asyncio.run_coroutine_threadsafe(self._websocket_send(message), self._ensure_event_loop())
+                result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=30)
+            except asyncio.TimeoutError:
+                self.logger.warning("⏰ WebSocket请求超时")
+                result = None
+            except Exception as e:
+                self.logger.error("❌ WebSocket发送失败: %s", e)
+                result = None
+            if result and result not in ["抱歉，我没有理解您的意思", "请求超时"]:
+                return result
+            else:
+                self.logger.warning("⚠️ WebSocket请求失败，结果: %s", result)
 
-            if thread.is_alive():
+        error_msg = self._get_connection_error_details()
+        self.logger.error("❌ 所有连接方式都失败: %s", error_msg)
+        return f"无法连接到AI服务。{error_msg}"
+
+    async def _asend_via_http(self, message, chat_mode=False):
+        """通过ollama.AsyncClient在调用方的事件循环中发送消息"""
+        if not self.async_client:
+            return None
+
+        try:
+            messages, options = self._build_request(message, chat_mode)
+            start_time = time.time()
+
+            try:
+                response = await asyncio.wait_for(self._astream_chat(messages, options), timeout=100)  # 100秒超时
+            except asyncio.TimeoutError:
                 self.logger.warning("⏰ 请求超时，返回默认回复")
                 return "小电正在努力学习这个问题"
-
-            if exception[0]:
-                self.logger.error(f"❌ 调用异常: {exception[0]}")
+            except _OLLAMA_UNAVAILABLE_ERRORS as e:
+                self.http_available = False
+                self._probe_ok = False
+                self.logger.error("❌ 无法连接Ollama服务: %s", e)
+                return None
+            except Exception as e:
+                self.logger.error("❌ 调用异常: %s", e)
                 return "小电正在努力学习这个问题"
 
-            response = result[0]
-            end_time = time.time()
-            self.logger.info(f"⏱️ 请求耗时: {end_time - start_time:.2f}秒")
+            self.http_available = True
+            self.logger.info("⏱️ 请求耗时: %.2f秒", time.time() - start_time)
+            return self._finish_reply(message, response)
 
-            # 检查是否超时但线程已结束
-            if response is None:
-                self.logger.warning("⚠️ 响应为空，返回默认回复")
-                return "小电正在努力学习这个问题"
+        except Exception as e:
+            self.logger.error("❌ 通信错误: %s", e)
+            return "小电正在努力学习这个问题"
+
+    async def _astream_chat(self, messages, options):
+        """异步流式调用chat接口，边接收边去除思考内容，返回拼接后的可见回复"""
+        stripper = _ThinkStripper()
+        parts = []
+
+        try:
+            async for chunk in await self.async_client.chat(
+                    model=self.model_name, messages=messages, options=options, stream=True):
+                visible = stripper.feed(chunk['message']['content'])
+                if visible:
+                    parts.append(visible)
+        except Exception as e:
+            if not parts:
+                raise
+            self.logger.warning("⚠️ 流式响应中断，返回已生成的内容: %s", e)
+
+        parts.append(stripper.flush())
+        return ''.join(parts)
+
+    def _build_request(self, message, chat_mode):
+        """根据模式构建消息列表和生成参数"""
+        if chat_mode:
+            messages = self._build_chat_messages(message)
+            options = _CHAT_OPTIONS
+        else:
+            messages = self._build_messages_with_history(message)
+            options = _CONTROL_OPTIONS
 
-            content = response['message']['content'].strip()
+        self.logger.info("🔄 调用Ollama聊天接口...%s", '聊天模式' if chat_mode else '设备控制模式')
+        return messages, options
 
-            self.logger.info(f"📄 原始响应: '{content}'")
+    def _finish_reply(self, message, response):
+        """处理模型回复：过滤思考内容、校验有效性并更新对话历史"""
+        # 检查是否超时但线程已结束
+        if response is None:
+            self.logger.warning("⚠️ 响应为空，返回默认回复")
+            return "小电正在努力学习这个问题"
 
-            # 过滤思考内容
-            filtered_response = self._filter_think_tags(content)
+        content = response.strip()
 
-            self.logger.info(f"🧹 过滤后响应: '{filtered_response}'")
+        self.logger.info("📄 模型响应: '%s'", content)
 
-            if filtered_response and filtered_response not in ["小电还在思考中，我们换个话题聊聊吧~"]:
-                self._update_conversation_history(message, filtered_response)
-                return filtered_response
-            else:
-                self.logger.warning("⚠️ 过滤后回复内容为空或无效")
-                return "小电正在努力学习这个问题"
+        # 过滤思考内容（流式读取时已去除，这里处理空回复）
+        filtered_response = self._filter_think_tags(content)
 
-        except Exception as e:
-            self.logger.error(f"❌ 通信错误: {e}")
+        self.logger.info("🧹 过滤后响应: '%s'", filtered_response)
+
+        if filtered_response and filtered_response not in ["小电还在思考中，我们换个话题聊聊吧~"]:
+            self._update_conversation_history(message, filtered_response)
+            return filtered_response
+        else:
+            self.logger.warning("⚠️ 过滤后回复内容为空或无效")
             return "小电正在努力学习这个问题"
 
+    def _stream_chat(self, messages, options, on_sentence=None, cancelled=None):
+        """流式调用chat接口，边接收边去除思考内容，返回拼接后的可见回复；提供on_sentence时按句回调"""
+        stripper = _ThinkStripper()
+        parts = []
+        pending = ''  # 尚未回调的不完整句子
+
+        try:
+            for chunk in self.client.chat(model=self.model_name, messages=messages, options=options, stream=True):
+                if cancelled is not None and cancelled.is_set():
+                    break
+                visible = stripper.feed(chunk['message']['content'])
+                if not visible:
+                    continue
+                parts.append(visible)
+
+                if on_sentence is None:
+                    continue
+                pending += visible
+                end = max(pending.rfind(mark) for mark in _SENTENCE_END_MARKS) + 1
+                if end:
+                    self._emit_sentence(on_sentence, pending[:end])
+                    pending = pending[end:]
+        except Exception as e:
+            # 超过空闲超时仍无新内容（模型卡住）或连接中断：已有可见内容时直接返回，而不是整体作废
+            if not parts:
+                raise
+            self.logger.warning("⚠️ 流式响应中断，返回已生成的内容: %s", e)
+
+        rest = stripper.flush()
+        if rest:
+            parts.append(rest)
+            pending += rest
+        # 生成结束时输出剩余的不完整句子
+        if on_sentence is not None and pending and not (cancelled is not None and cancelled.is_set()):
+            self._emit_sentence(on_sentence, pending)
+
+        return ''.join(parts)
+
+    def _emit_sentence(self, on_sentence, sentence):
+        """调用句子回调，回调异常不影响生成"""
+        sentence = sentence.strip()
+        if not sentence:
+            return
+        try:
+            on_sentence(sentence)
+        except Exception as e:
+            self.logger.error("❌ 句子回调异常: %s", e)
+
     def _build_chat_messages(self, current_message):
         """构建聊天专用消息列表 - 修复缺失的方法"""
         messages = []
 
-        # 聊天专用系统提示词
-        system_prompt = """
-【档案室介绍】
-该项目是国网辽宁鞍山供电公司 2025 年计量资产精益化运营项目，旨在破解传统档案管理空间饱和、效率低下难题，
-现有 5400 余盒档案存储已达上限的 90%。项目拟用 60㎡现有场地，购置 13 列 52 组双面智能移动档案密集柜
-4（总存储量 9800 盒，较原提升 63.33%），打造AI 智能大屏中枢：实时可视化呈现库房温湿度、设备状态及档案动态，
-配套智慧管理控制室总台、RFID 辅助设备等 5 类设施，集成 NLP 语义识别、OCR 识别等技术，实现档案一键智能识别、全文检索、可视化定位。
-将全面提升计量中心档案管理的数字化水平和智能化水平，为用户提供更加便捷、高效、安全的档案管理服务。     
-【角色设定】
-您好！我是国家电网档案柜助手 “小电”，专注于档案室相关服务，核心功能包括档案查询与设备控制，现将服务范围明确如下：
-一、核心服务内容
-档案查询：支持按档案编号、名称、归档日期等条件检索档案室存量档案，提供精准查询结果与调取指引；
-设备控制：可操作档案室专用设备，包括空调（温度调节）、密集架（开启 / 关闭 / 定位）、除鼠器（启动 / 状态查询）、恒湿温度一体机（温湿度参数调整与监控）。
-二、操作说明
-请您明确告知具体需求，例如 “查询东鹏的档案”“将档案室空调温度调整至 24℃”“启动 3 号密集架并定位至第 5 列”，我将按规范流程执行操作并反馈结果。
-所有操作均遵循档案室安全管理规范，如需调整关键设备参数（如温湿度阈值），将同步记录操作日志，确保档案存储环境安全可控。请提出您的具体需求，我将及时响应。
-要求：
-1、输出回答的时候不要有😊表情符号以及#和**和换行符号以及特殊符号"""
-
-        # 添加系统消息
-        messages.append({"role": "system", "content": system_prompt})
+        # 添加系统消息（共享模块级常量，不在每次请求时重建）
+        messages.append(_SYSTEM_MESSAGE)
 
         # 添加对话历史
-        if hasattr(self, 'conversation_history') and self.conversation_history:
-            for msg in self.conversation_history[-6:]:  # 保留最近3轮对话
-                messages.append({"role": msg["role"], "content": msg["content"]})
+        if self.conversation_history:
+            # 历史记录中的消息字典创建后不再修改，可直接复用
+            history = self.conversation_history
+            messages.extend(islice(history, max(0, len(history) - 6), None))  # 保留最近3轮对话
 
         # 添加当前用户消息
         messages.append({"role": "user", "content": current_message})
 
-        self.logger.info(f"📝 构建的聊天消息列表，共 {len(messages)} 条消息")
+        self.logger.debug("📝 构建的聊天消息列表，共 %s 条消息", len(messages))
         return messages
 
     def _build_messages_with_history(self, current_message):
         """构建包含对话历史的消息列表 - 修复缺失的方法"""
         messages = []
-        # 设备控制专用系统提示词
-        system_prompt = """
-【档案室介绍】
-该项目是国网辽宁鞍山供电公司 2025 年计量资产精益化运营项目，旨在破解传统档案管理空间饱和、效率低下难题，
-现有 5400 余盒档案存储已达上限的 90%。项目拟用 60㎡现有场地，购置 13 列 52 组双面智能移动档案密集柜
-4（总存储量 9800 盒，较原提升 63.33%），打造AI 智能大屏中枢：实时可视化呈现库房温湿度、设备状态及档案动态，
-配套智慧管理控制室总台、RFID 辅助设备等 5 类设施，集成 NLP 语义识别、OCR 识别等技术，实现档案一键智能识别、全文检索、可视化定位。
-将全面提升计量中心档案管理的数字化水平和智能化水平，为用户提供更加便捷、高效、安全的档案管理服务。     
-【角色设定】
-您好！我是国家电网档案柜助手 “小电”，专注于档案室相关服务，核心功能包括档案查询与设备控制，现将服务范围明确如下：
-一、核心服务内容
-档案查询：支持按档案编号、名称、归档日期等条件检索档案室存量档案，提供精准查询结果与调取指引；
-设备控制：可操作档案室专用设备，包括空调（温度调节）、密集架（开启 / 关闭 / 定位）、除鼠器（启动 / 状态查询）、恒湿温度一体机（温湿度参数调整与监控）。
-二、操作说明
-请您明确告知具体需求，例如 “查询东鹏的档案”“将档案室空调温度调整至 24℃”“启动 3 号密集架并定位至第 5 列”，我将按规范流程执行操作并反馈结果。
-所有操作均遵循档案室安全管理规范，如需调整关键设备参数（如温湿度阈值），将同步记录操作日志，确保档案存储环境安全可控。请提出您的具体需求，我将及时响应。
-要求：
-1、输出回答的时候不要有😊表情符号以及#和**和换行符号以及特殊符号"""
-
-        # 添加系统消息
-        messages.append({"role": "system", "content": system_prompt})
+        # 添加系统消息（共享模块级常量，不在每次请求时重建）
+        messages.append(_SYSTEM_MESSAGE)
 
         # 添加对话历史
-        if hasattr(self, 'conversation_history') and self.conversation_history:
-            for msg in self.conversation_history[-8:]:  # 保留最近4轮对话
-                messages.append({"role": msg["role"], "content": msg["content"]})
+        if self.conversation_history:
+            # 历史记录中的消息字典创建后不再修改，可直接复用
+            messages.extend(self.conversation_history)  # 保留最近4轮对话（deque已限定长度）
 
         # 添加当前用户消息
         messages.append({"role": "user", "content": current_message})
 
-        self.logger.info(f"📝 构建的设备控制消息列表，共 {len(messages)} 条消息")
+        self.logger.debug("📝 构建的设备控制消息列表，共 %s 条消息", len(messages))
         return messages
 
 
     def get_available_models(self):
         """获取可用的模型列表"""
+        # 模型列表基本不变，缓存一段时间，避免每次切换模型都重新请求
+        if self._models_cache is not None and time.monotonic() - self._models_time < _MODELS_CACHE_TTL:
+            return list(self._models_cache)
+
         try:
-            if self.http_available:
-                url = f"{self.base_url}{self.tags_endpoint}"
-                response = requests.get(url, timeout=10)
+            url = f"{self.base_url}{_TAGS_PATH}"
+            response = self._http.get(url, timeout=10)
 
-                if response.status_code == 200:
-                    models = response.json().get('models', [])
-                    return [model.get('name', '') for model in models]
+            if response.status_code == 200:
+                self.http_available = True
+                models = _json_loads(response.content).get('models', [])
+                self._models_cache = [model.get('name', '') for model in models]
+                self._models_time = time.monotonic()
+                return list(self._models_cache)
             return []
         except Exception as e:
-            self.logger.error(f"获取模型列表失败: {e}")
+            self.logger.error("获取模型列表失败: %s", e)
+            self.http_available = False
             return []
 
     def change_model(self, model_name):
         """切换模型"""
-        available_models = self.get_available_models()
-        if any(model_name in name for name in available_models):
+        available_models = set(self.get_available_models())
+        # 完整名称精确匹配（如"qwen3:8b"），或只给出名称部分（如"qwen3"匹配"qwen3:latest"等标签）
+        if model_name in available_models or any(name.startswith(model_name + ":") for name in available_models):
             self.model_name = model_name
-            self.logger.info(f"✅ 已切换模型为: {model_name}")
+            self.logger.info("✅ 已切换模型为: %s", model_name)
             return True
         else:
-            self.logger.error(f"❌ 模型 {model_name} 不可用")
+            self.logger.error("❌ 模型 %s 不可用", model_name)
             return False
 
     def clear_history(self):
         """清空对话历史"""
-        self.conversation_history = []
-        self.logger.info("对话历史已清空")
\ No newline at end of file
+        self.conversation_history.clear()
+        self.logger.info("对话历史已清空")
+
+    def close(self):
+        """关闭HTTP连接池、线程池和异步请求消费者"""
+        try:
+            self._http.close()
+        except Exception as e:
+            self.logger.error("关闭HTTP连接失败: %s", e)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._cancel_request_task()
+        if self._loop is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_websocket(), self._loop).result(timeout=5)
+            except Exception as e:
+                self.logger.error("关闭WebSocket连接失败: %s", e)
+            self._loop.call_soon_threadsafe(self._loop.stop)
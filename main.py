@@ -270,8 +270,9 @@ class DocumentAPI:
     def extract_documents(self, content):
         """从内容中提取文档名称"""
         import re
-        pattern = r'([^，,\s]+\.(docx|xlsx|pdf|txt|doc|ppt|pptx))'
-        matches = re.findall(pattern, content, re.IGNORECASE)
+        # 只有扩展名需要忽略大小写
+        pattern = r'([^，,\s]+\.((?i:docx|xlsx|pdf|txt|doc|ppt|pptx)))'
+        matches = re.findall(pattern, content)
         documents = [match[0] for match in matches]
         return documents
 